@@ -28,6 +28,7 @@
 
 """Command line tools for manipulating a Kedro project.
 Intended to be invoked via `kedro`."""
+import json
 import os
 from itertools import chain
 from pathlib import Path
@@ -73,6 +74,27 @@ command arguments from. If command line arguments are provided, they will
 override the loaded ones."""
 PIPELINE_ARG_HELP = """Name of the modular pipeline to run.
 If not set, the project pipeline is run by default."""
+CONVERT_SOURCE_HELP = """Directory with the CSV partitions to convert."""
+CONVERT_TARGET_HELP = """Directory for the converted partitions.
+If not set, they are written next to the CSV files."""
+CONVERT_FORMAT_HELP = """Columnar file format of the converted partitions."""
+CONVERT_FLOAT_DTYPE_HELP = """Cast the floating point columns to this dtype.
+If not set, they are kept as float64."""
+CONVERT_REMOVE_HELP = """Delete each CSV file once it is converted."""
+CONVERT_METADATA_TARGET_HELP = """Directory for the JSON metadata records split out
+of the CSV partitions, read by the `sgs_metadata` dataset."""
+BENCHMARK_PARTITIONS_HELP = """Number of synthetic SGS partitions (environment
+conditions) to run the pipelines on. Option can be used multiple times to fit
+how the costs scale with it."""
+BENCHMARK_STEPS_HELP = """Time steps of each synthetic partition."""
+BENCHMARK_PIPELINE_HELP = """Name of a pipeline to benchmark, in the order they
+are run. Option can be used multiple times."""
+BENCHMARK_ENV_HELP = """Environment the pipelines run in. Its SGS partitions are
+deleted, so it must not be `base` or `local` and its catalog must redirect them
+under `data/benchmark`."""
+BENCHMARK_SEED_HELP = """Seed of the synthetic partitions."""
+BENCHMARK_PROJECT_TO_HELP = """Number of partitions the costs are projected to."""
+BENCHMARK_OUTPUT_HELP = """JSON file to save the benchmark results to."""
 PARAMS_ARG_HELP = """Specify extra parameters that you want to pass
 to the context initializer. Items must be separated by comma, keys - by colon,
 example: param1:value1,param2:value2. Each parameter is split by the first comma,
@@ -235,6 +257,94 @@ def run(
     )
 
 
+@cli.command("convert-sgs")
+@click.option(
+    "--source", type=click.Path(exists=True, file_okay=False),
+    default="data/01_raw/sgs", help=CONVERT_SOURCE_HELP,
+)
+@click.option("--target", type=click.Path(file_okay=False), default=None,
+              help=CONVERT_TARGET_HELP)
+@click.option("--format", "file_format", type=click.Choice(["parquet", "feather"]),
+              default="parquet", help=CONVERT_FORMAT_HELP)
+@click.option("--float-dtype", type=click.Choice(["float32", "float64"]),
+              default=None, help=CONVERT_FLOAT_DTYPE_HELP)
+@click.option("--remove-source", is_flag=True, help=CONVERT_REMOVE_HELP)
+@click.option("--metadata-target", type=click.Path(file_okay=False),
+              default="data/01_raw/sgs_metadata", help=CONVERT_METADATA_TARGET_HELP)
+def convert_sgs(source, target, file_format, float_dtype, remove_source,
+                metadata_target):
+    """Convert CSV SGS partitions to columnar files and metadata records."""
+    from kedro_mlflow_tutorial.dataset_types import convert_csv_partitions
+
+    converted = convert_csv_partitions(
+        source,
+        target,
+        file_format=file_format,
+        float_dtype=float_dtype,
+        remove_source=remove_source,
+        metadata_dir=metadata_target,
+    )
+    click.echo("Converted {} partition(s).".format(len(converted)))
+
+
+@cli.command("benchmark-pipelines")
+@click.option("--partitions", "-n", type=int, multiple=True, default=[100],
+              help=BENCHMARK_PARTITIONS_HELP)
+@click.option("--steps", type=int, default=10800, help=BENCHMARK_STEPS_HELP)
+@click.option("--pipeline", "pipelines", type=str, multiple=True,
+              default=["de", "ds"], help=BENCHMARK_PIPELINE_HELP)
+@click.option("--env", "-e", type=str, default="benchmark", help=BENCHMARK_ENV_HELP)
+@click.option("--seed", type=int, default=0, help=BENCHMARK_SEED_HELP)
+@click.option("--project-to", type=int, default=10000,
+              help=BENCHMARK_PROJECT_TO_HELP)
+@click.option("--output", type=click.Path(dir_okay=False), default=None,
+              help=BENCHMARK_OUTPUT_HELP)
+@click.option(
+    "--params", type=str, default="", help=PARAMS_ARG_HELP, callback=_split_params
+)
+def benchmark_pipelines(
+    partitions, steps, pipelines, env, seed, project_to, output, params
+):
+    """Benchmark the pipelines end to end on synthetic SGS partitions."""
+    from kedro_mlflow_tutorial.benchmark import (
+        PROTECTED_ENVS,
+        benchmark_pipelines as run_benchmark,
+        scaling_summary,
+    )
+
+    if env in PROTECTED_ENVS:
+        raise KedroCliError(
+            "Benchmarks delete the SGS partitions of their environment, "
+            "please use an environment other than {}.".format(PROTECTED_ENVS)
+        )
+
+    results = run_benchmark(
+        Path.cwd(),
+        partitions,
+        steps,
+        pipelines=pipelines,
+        env=env,
+        seed=seed,
+        extra_params=params,
+    )
+    summary = scaling_summary(results, project_to=project_to)
+    click.echo(summary.to_string(float_format="{:.3f}".format))
+
+    if output:
+        report = {
+            "partitions": list(partitions),
+            "steps": steps,
+            "pipelines": list(pipelines),
+            "env": env,
+            "seed": seed,
+            "results": results,
+            "summary": summary.reset_index().to_dict("records"),
+        }
+        with open(output, "w") as report_file:
+            json.dump(report, report_file, indent=2, default=str)
+        click.echo("Saved the benchmark results to {}.".format(output))
+
+
 cli.add_command(pipeline_group)
 cli.add_command(catalog_group)
 cli.add_command(jupyter_group)
@@ -0,0 +1,331 @@
+"""End-to-end benchmark of the project pipelines on synthetic SGS data.
+
+The synthetic partitions (see ``utils.synthetic``) are written through the
+catalog of a dedicated environment, then each pipeline is run in a fresh
+process, so its peak memory is not hidden by the previous ones.
+"""
+import multiprocessing
+import resource
+import shutil
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+from kedro.config import ConfigLoader
+from kedro.framework.context import KedroContext, load_context
+from kedro.framework.hooks import get_hook_manager, hook_impl
+from kedro.pipeline.node import Node
+
+from kedro_mlflow_tutorial.pipelines.data_integration.nodes import (
+    sgs_partition_id,
+)
+from kedro_mlflow_tutorial.utils.synthetic import generate_sgs_runs
+
+# Datasets the synthetic runs are written to
+SYNTHETIC_DATASETS = ["sgs_dataset", "sgs_metadata"]
+
+# Partitioned datasets emptied before each benchmark, so that the
+# partitions of a previous, larger benchmark are not processed again
+CLEARED_DATASETS = SYNTHETIC_DATASETS + ["transformed_sgs_dataset"]
+
+# Environments whose data must never be deleted by a benchmark
+PROTECTED_ENVS = ["base", "local"]
+
+# Directory, relative to the project, the cleared datasets must be in
+BENCHMARK_ROOT = Path("data", "benchmark")
+
+# Metrics recorded for a whole pipeline run, besides the node times
+PIPELINE_METRICS = ["wall_time", "run_time", "peak_rss_mb", "peak_children_rss_mb"]
+
+
+class NodeTimingHooks:
+    """Accumulates the wall time of every node run, in seconds."""
+
+    def __init__(self):
+        self.times = defaultdict(float)
+        self._started = {}
+
+    @hook_impl
+    def before_node_run(self, node: Node) -> None:
+        self._started[node.name] = time.perf_counter()
+
+    @hook_impl
+    def after_node_run(self, node: Node) -> None:
+        self.times[node.name] += time.perf_counter() - self._started.pop(
+            node.name
+        )
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Returns the peak resident memory of this process and of its
+    terminated children (e.g. the ``n_workers`` pool), in MiB.
+    """
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    scale = (1 if sys.platform == "darwin" else 1024) / 2 ** 20
+    usage = {
+        "peak_rss_mb": resource.RUSAGE_SELF,
+        "peak_children_rss_mb": resource.RUSAGE_CHILDREN,
+    }
+    return {
+        name: resource.getrusage(who).ru_maxrss * scale
+        for name, who in usage.items()
+    }
+
+
+def write_synthetic_data(
+    context: KedroContext,
+    n_partitions: int,
+    n_steps: int,
+    seed: int = 0,
+    session_id: int = 0,
+) -> None:
+    """Replaces the SGS partitions of the context catalog by synthetic ones.
+
+    The partitions have the layout the download node saves: only the
+    ``sgs.download.columns`` time series in ``sgs_dataset`` and the
+    ``sgs.download.metadata`` scalars as ``sgs_metadata`` records, all of
+    them when these parameters are null.
+
+    Args:
+        context: context of the benchmark environment.
+        n_partitions: number of environment conditions.
+        n_steps: time steps of each run.
+        seed: base seed of the runs.
+        session_id: session the partitions are named after.
+
+    """
+    for path in cleared_paths(context):
+        if path.exists():
+            shutil.rmtree(str(path))
+
+    download_params = context.params["sgs"]["download"]
+    columns = download_params.get("columns")
+    metadata_names = download_params.get("metadata")
+
+    # Saved one partition at a time, PartitionedDataSet keeps the others
+    catalog = context.catalog
+    for env_cond_id, data, metadata in generate_sgs_runs(
+        n_partitions, n_steps, seed=seed, session_id=session_id
+    ):
+        partition_id = sgs_partition_id(session_id, env_cond_id)
+        if columns:
+            data = data[list(columns)]
+        if metadata_names:
+            metadata = {name: metadata[name] for name in metadata_names}
+        catalog.save("sgs_dataset", {partition_id: data})
+        catalog.save("sgs_metadata", {partition_id: metadata})
+
+
+def base_catalog_config(context: KedroContext) -> Dict[str, Any]:
+    """Returns the catalog configuration of the ``base`` environment only."""
+    conf_path = Path(context.project_path) / context.CONF_ROOT / "base"
+    return ConfigLoader([str(conf_path)]).get("catalog*", "catalog*/**")
+
+
+def cleared_paths(context: KedroContext) -> List[Path]:
+    """Resolves the paths of ``CLEARED_DATASETS`` in the context catalog,
+    making sure they hold no real data. An environment which does not
+    override these datasets falls back to the base catalog, so its name
+    alone does not tell whether its partitions can be deleted.
+
+    Raises:
+        ValueError: if a path is the one of the base catalog or is not
+            under ``BENCHMARK_ROOT``.
+
+    Returns:
+        The absolute paths of the cleared datasets.
+
+    """
+    project_path = Path(context.project_path).resolve()
+    root = project_path / BENCHMARK_ROOT
+    conf_catalog = context.config_loader.get("catalog*", "catalog*/**")
+    base_catalog = base_catalog_config(context)
+
+    paths = []
+    for name in CLEARED_DATASETS:
+        path = (project_path / conf_catalog[name]["path"]).resolve()
+        base_path = base_catalog.get(name, {}).get("path")
+        if base_path and path == (project_path / base_path).resolve():
+            raise ValueError(
+                "Benchmarks delete the partitions of {}, whose path {} is "
+                "the one of the base catalog, please override it in the "
+                "benchmark environment".format(name, path)
+            )
+        if root not in path.parents:
+            raise ValueError(
+                "Benchmarks delete the partitions of {}, whose path {} is "
+                "not under {}".format(name, path, root)
+            )
+        paths.append(path)
+
+    return paths
+
+
+def run_pipeline(
+    project_path: Path,
+    pipeline_name: str,
+    env: str,
+    extra_params: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    """Runs a pipeline and times its nodes. Meant to run in a fresh process,
+    as the peak memory of a process can only grow.
+
+    Returns:
+        The run time of the pipeline and of each node, in seconds, and the
+        peak memory of the process.
+
+    """
+    context = load_context(project_path, env=env, extra_params=extra_params)
+    timer = NodeTimingHooks()
+    get_hook_manager().register(timer)
+
+    start = time.perf_counter()
+    context.run(pipeline_name=pipeline_name)
+    run_time = time.perf_counter() - start
+
+    return {"run_time": run_time, **peak_rss_mb(), "nodes": dict(timer.times)}
+
+
+def benchmark_pipelines(
+    project_path: Path,
+    partitions: Iterable[int],
+    n_steps: int,
+    pipelines: Iterable[str] = ("de", "ds"),
+    env: str = "benchmark",
+    seed: int = 0,
+    extra_params: Dict[str, Any] = None,
+) -> List[Dict[str, Any]]:
+    """Runs the pipelines on each number of synthetic partitions.
+
+    Args:
+        project_path: root of the Kedro project.
+        partitions: numbers of environment conditions to benchmark.
+        n_steps: time steps of each synthetic run.
+        pipelines: names of the pipelines, run in this order.
+        env: configuration environment, whose catalog must not point to
+            real SGS data since its partitions are deleted.
+        seed: base seed of the synthetic runs.
+        extra_params: parameters overriding the configured ones.
+
+    Returns:
+        One record per number of partitions and pipeline, with its wall
+        time (including the process start and context loading), run time,
+        peak memory and node times.
+
+    """
+    if env in PROTECTED_ENVS:
+        raise ValueError(
+            "Benchmarks delete the SGS partitions of their environment, "
+            "got env={!r}".format(env)
+        )
+
+    # spawn gives every pipeline a fresh process, thus a fresh peak memory
+    mp_context = multiprocessing.get_context("spawn")
+    results = []
+    for n_partitions in partitions:
+        context = load_context(project_path, env=env, extra_params=extra_params)
+        start = time.perf_counter()
+        write_synthetic_data(context, n_partitions, n_steps, seed=seed)
+        results.append({
+            "partitions": n_partitions,
+            "pipeline": "generate",
+            "wall_time": time.perf_counter() - start,
+        })
+
+        for pipeline_name in pipelines:
+            start = time.perf_counter()
+            with ProcessPoolExecutor(1, mp_context=mp_context) as executor:
+                result = executor.submit(
+                    run_pipeline, project_path, pipeline_name, env, extra_params
+                ).result()
+            results.append({
+                "partitions": n_partitions,
+                "pipeline": pipeline_name,
+                "wall_time": time.perf_counter() - start,
+                **result,
+            })
+
+    return results
+
+
+def scaling_summary(
+    results: List[Dict[str, Any]], project_to: int = 10000
+) -> pd.DataFrame:
+    """Fits each metric of the benchmark results linearly in the number of
+    partitions, and projects it to ``project_to`` partitions.
+
+    Args:
+        results: records returned by ``benchmark_pipelines``.
+        project_to: number of partitions to project the metrics to.
+
+    Returns:
+        One row per pipeline and metric (``node:<name>`` for the node times),
+        with one column per number of partitions benchmarked, the fitted
+        cost per partition (``per_partition``) and the projection. The times
+        of a single number of partitions are fitted by a proportional model,
+        and the memory is not projected.
+
+    """
+    records = []
+    for result in results:
+        metrics = {
+            name: result[name] for name in PIPELINE_METRICS if name in result
+        }
+        metrics.update({
+            "node:" + name: value
+            for name, value in result.get("nodes", {}).items()
+        })
+        records.extend(
+            {
+                "pipeline": result["pipeline"],
+                "metric": name,
+                "partitions": result["partitions"],
+                "value": value,
+            }
+            for name, value in metrics.items()
+        )
+
+    summary = pd.DataFrame(records).pivot_table(
+        index=["pipeline", "metric"], columns="partitions", values="value"
+    )
+    # pivot_table sorts the pipelines, keep them in the order they ran
+    order = list(dict.fromkeys(result["pipeline"] for result in results))
+    summary = summary.reindex(order, level="pipeline")
+
+    counts = np.asarray(summary.columns, dtype=float)
+    memory = summary.index.get_level_values("metric").str.endswith("_mb")
+    slope, intercept = np.transpose([
+        fit_scaling(counts, values, baseline=is_memory)
+        for values, is_memory in zip(summary.to_numpy(), memory)
+    ])
+    summary["per_partition"] = slope
+    summary["projected_{}".format(project_to)] = intercept + slope * project_to
+
+    return summary
+
+
+def fit_scaling(
+    counts: np.ndarray, values: np.ndarray, baseline: bool = False
+) -> Tuple[float, float]:
+    """Fits ``values = intercept + slope * counts`` over the counts a metric
+    was measured at. A single measure is fitted by a proportional model,
+    unless the metric has a ``baseline`` (e.g. the memory) which cannot be
+    told apart from its slope, then the fit is NaN.
+
+    Returns:
+        The slope and intercept of the fit.
+
+    """
+    measured = ~np.isnan(values)
+    counts, values = counts[measured], values[measured]
+    if len(counts) > 1:
+        slope, intercept = np.polyfit(counts, values, 1)
+        return slope, intercept
+    if len(counts) == 1 and not baseline:
+        return values[0] / counts[0], 0.0
+    return np.nan, np.nan
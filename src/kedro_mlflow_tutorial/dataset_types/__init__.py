@@ -0,0 +1,10 @@
+"""Project dataset types, to be referenced from ``conf/base/catalog.yml``
+as ``kedro_mlflow_tutorial.dataset_types.<DataSetName>``.
+"""
+
+from .types import (  # NOQA
+    ColumnarDataSet,
+    LazyPartitionedDataSet,
+    NpyPartitionedDataSet,
+    convert_csv_partitions,
+)
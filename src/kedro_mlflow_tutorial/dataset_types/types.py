@@ -0,0 +1,394 @@
+import json
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from kedro.io import AbstractDataSet, DataSetError, PartitionedDataSet
+
+from kedro_mlflow_tutorial.utils.tpn import SGS_METADATA, to_python_value
+
+
+class LazyPartitionedDataSet(PartitionedDataSet):
+    '''
+    PartitionedDataSet that accepts callables as partition data when
+    saving. Each callable is only called right before its partition is
+    written, so a node can return a dict of lazy partitions and at most
+    one of them is held in memory at a time.
+
+    It takes the same arguments as ``PartitionedDataSet``:
+
+    .. code-block:: yaml
+
+        transformed_sgs_dataset:
+          type: kedro_mlflow_tutorial.dataset_types.LazyPartitionedDataSet
+          path: data/02_intermediate/sgs
+          dataset: pandas.CSVDataSet
+    '''
+
+    def _save(self, data: Dict[str, Union[Any, Callable[[], Any]]]) -> None:
+        for partition_id, partition_data in sorted(data.items()):
+            if callable(partition_data):
+                partition_data = partition_data()
+            super()._save({partition_id: partition_data})
+            del partition_data
+
+
+class ColumnarDataSet(AbstractDataSet):
+    '''
+    Stores a DataFrame in a columnar binary file (Parquet or Feather)
+    instead of CSV, so floats are written in binary and loading can be
+    restricted to a subset of the columns.
+
+    .. code-block:: yaml
+
+        feature_dataset:
+          type: kedro_mlflow_tutorial.dataset_types.ColumnarDataSet
+          filepath: data/04_feature/feature.parquet
+          float_dtype: float64
+
+        sgs_dataset:
+          type: PartitionedDataSet
+          path: data/01_raw/sgs
+          filename_suffix: .parquet
+          dataset:
+            type: kedro_mlflow_tutorial.dataset_types.ColumnarDataSet
+            columns: [x, y, z, xx, yy, zz]
+
+        Parameters:
+            filepath (str): path of the file
+            file_format (:obj:`str`, optional): 'parquet' or 'feather'
+            columns (:obj:`List[str]`, optional): columns to load. All
+                the columns are loaded if None.
+            float_dtype (:obj:`str`, optional): dtype of the floating
+                point columns when saving and loading, e.g. 'float32'.
+                They are kept as they are if None.
+            load_args (:obj:`Dict`, optional): extra arguments of
+                `pd.read_parquet` or `pd.read_feather`
+            save_args (:obj:`Dict`, optional): extra arguments of
+                `DataFrame.to_parquet` or `DataFrame.to_feather`
+    '''
+
+    FILE_FORMATS = ('parquet', 'feather')
+
+    def __init__(
+            self,
+            filepath: str,
+            file_format: str = 'parquet',
+            columns: List[str] = None,
+            float_dtype: str = None,
+            load_args: Dict[str, Any] = None,
+            save_args: Dict[str, Any] = None,
+        ) -> None:
+        if file_format not in self.FILE_FORMATS:
+            raise DataSetError(
+                "Unknown file format '{}'. Available formats: {}".format(
+                    file_format, ', '.join(self.FILE_FORMATS)
+                )
+            )
+        self._filepath = Path(filepath)
+        self._file_format = file_format
+        self._columns = columns
+        self._float_dtype = float_dtype
+        self._load_args = load_args or {}
+        self._save_args = save_args or {}
+
+    def _load(self) -> pd.DataFrame:
+        if self._file_format == 'parquet':
+            data = pd.read_parquet(
+                self._filepath, columns=self._columns, **self._load_args
+            )
+        else:
+            data = pd.read_feather(
+                self._filepath, columns=self._columns, **self._load_args
+            )
+
+        return cast_float_columns(data, self._float_dtype)
+
+    def _save(self, data: pd.DataFrame) -> None:
+        data = cast_float_columns(data, self._float_dtype)
+        self._filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        if self._file_format == 'parquet':
+            save_args = {'index': False, **self._save_args}
+            data.to_parquet(self._filepath, **save_args)
+        else:
+            # Feather only stores a default index
+            data.reset_index(drop=True).to_feather(
+                self._filepath, **self._save_args
+            )
+
+    def _exists(self) -> bool:
+        return self._filepath.is_file()
+
+    def _describe(self) -> Dict[str, Any]:
+        return dict(
+            filepath=str(self._filepath),
+            file_format=self._file_format,
+            columns=self._columns,
+            float_dtype=self._float_dtype,
+            load_args=self._load_args,
+            save_args=self._save_args,
+        )
+
+
+class NpyPartitionedDataSet(AbstractDataSet):
+    '''
+    Partitioned dataset where every partition is a directory holding one
+    `.npy` file per column. Loading returns, like ``PartitionedDataSet``,
+    a dict of callables, each returning a dict of memory-mapped column
+    arrays, so the columns are read lazily from the page cache and no
+    DataFrame is built. Partitions can be saved from DataFrames, dicts
+    of arrays or callables returning either of them.
+
+    .. code-block:: yaml
+
+        transformed_sgs_dataset:
+          type: kedro_mlflow_tutorial.dataset_types.NpyPartitionedDataSet
+          path: data/02_intermediate/sgs
+
+        Parameters:
+            path (str): directory holding the partition directories
+            columns (:obj:`List[str]`, optional): columns to load. All
+                the columns are loaded if None.
+            mmap_mode (:obj:`str`, optional): `np.load` memory-map mode.
+                The arrays are read in memory if None.
+            float_dtype (:obj:`str`, optional): dtype of the floating
+                point columns when saving, e.g. 'float32'.
+    '''
+
+    def __init__(
+            self,
+            path: str,
+            columns: List[str] = None,
+            mmap_mode: str = 'r',
+            float_dtype: str = None,
+        ) -> None:
+        self._path = Path(path)
+        self._columns = columns
+        self._mmap_mode = mmap_mode
+        self._float_dtype = float_dtype
+
+    def _list_partitions(self) -> List[Path]:
+        if not self._path.is_dir():
+            return []
+
+        return sorted(
+            partition for partition in self._path.iterdir()
+            if partition.is_dir()
+        )
+
+    def _load(self) -> Dict[str, Callable[[], Dict[str, np.ndarray]]]:
+        partitions = self._list_partitions()
+        if not partitions:
+            raise DataSetError(
+                'No partitions found in `{}`'.format(self._path)
+            )
+
+        return {
+            partition.name: partial(
+                load_npy_columns, str(partition), self._columns,
+                self._mmap_mode,
+            )
+            for partition in partitions
+        }
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        for partition_id, partition_data in sorted(data.items()):
+            if callable(partition_data):
+                partition_data = partition_data()
+            save_npy_columns(
+                str(self._path / partition_id), partition_data,
+                self._float_dtype,
+            )
+            del partition_data
+
+    def _exists(self) -> bool:
+        return bool(self._list_partitions())
+
+    def _describe(self) -> Dict[str, Any]:
+        return dict(
+            path=str(self._path),
+            columns=self._columns,
+            mmap_mode=self._mmap_mode,
+            float_dtype=self._float_dtype,
+        )
+
+
+def load_npy_columns(
+        directory: str,
+        columns: List[str] = None,
+        mmap_mode: str = 'r',
+    ) -> Dict[str, np.ndarray]:
+    '''
+    Loads the `.npy` column files of a directory as a dict of arrays,
+    memory-mapped unless mmap_mode is None.
+    '''
+    directory = Path(directory)
+    if columns is None:
+        columns = sorted(column.stem for column in directory.glob('*.npy'))
+
+    return {
+        column: np.load(
+            str(directory / '{}.npy'.format(column)), mmap_mode=mmap_mode
+        )
+        for column in columns
+    }
+
+
+def save_npy_columns(
+        directory: str,
+        data: Union[pd.DataFrame, Mapping[str, np.ndarray]],
+        float_dtype: str = None,
+    ) -> None:
+    '''
+    Saves every column of a DataFrame or dict of arrays as a `.npy`
+    file of the given directory.
+    '''
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    for column, values in data.items():
+        values = np.asarray(values)
+        if values.dtype == object:
+            raise DataSetError(
+                "Column '{}' has object dtype and cannot be "
+                "memory-mapped.".format(column)
+            )
+        if float_dtype is not None and values.dtype.kind == 'f':
+            values = values.astype(float_dtype)
+        np.save(str(directory / '{}.npy'.format(column)), values)
+
+
+def cast_float_columns(data: pd.DataFrame, float_dtype: str = None) -> pd.DataFrame:
+    '''
+    Casts the floating point columns of a DataFrame to the given dtype.
+    The DataFrame is returned untouched if float_dtype is None.
+    '''
+    if float_dtype is None:
+        return data
+
+    float_columns = data.select_dtypes(include='floating').columns
+
+    return data.astype({column: float_dtype for column in float_columns})
+
+
+def convert_csv_partitions(
+        source_dir: str,
+        target_dir: str = None,
+        file_format: str = 'parquet',
+        float_dtype: str = None,
+        remove_source: bool = False,
+        metadata_dir: str = None,
+    ) -> List[Path]:
+    '''
+    Converts a directory of CSV partitions, e.g. `data/01_raw/sgs`, to
+    columnar files readable by `ColumnarDataSet`. The partition
+    '22_0001_pos.csv' becomes '22_0001_pos.parquet'. Partitions already
+    converted are skipped.
+
+    With a metadata_dir, the SGS metadata columns repeated on every row
+    of the legacy partitions are split out as one JSON record per
+    partition, e.g. '22_0001_pos.json', the layout of `sgs_metadata`.
+    The records missing for partitions converted earlier are written
+    too, from the CSV file or from the metadata columns left in the
+    columnar file.
+
+        Parameters:
+            source_dir (str): directory with the CSV partitions
+            target_dir (:obj:`str`, optional): output directory. The
+                source directory is used if None.
+            file_format (:obj:`str`, optional): 'parquet' or 'feather'
+            float_dtype (:obj:`str`, optional): see `ColumnarDataSet`
+            remove_source (:obj:`bool`, optional): whether to delete each
+                CSV file once converted
+            metadata_dir (:obj:`str`, optional): output directory of the
+                metadata records. The metadata columns are kept in the
+                columnar files if None.
+
+        Returns:
+            converted (List[Path]): paths of the written files
+    '''
+    source_dir = Path(source_dir)
+    target_dir = Path(target_dir) if target_dir else source_dir
+
+    def record_path(partition_id: str) -> Union[Path, None]:
+        if metadata_dir is None:
+            return None
+        return Path(metadata_dir) / '{}.json'.format(partition_id)
+
+    converted = []
+    for source in sorted(source_dir.glob('*.csv')):
+        target = target_dir / '{}.{}'.format(source.stem, file_format)
+        record = record_path(source.stem)
+        if not target.exists() or (record and not record.exists()):
+            data = pd.read_csv(source)
+            if record:
+                data, metadata = split_sgs_metadata(data)
+                save_metadata_record(metadata, record)
+            if not target.exists():
+                ColumnarDataSet(
+                    str(target), file_format=file_format,
+                    float_dtype=float_dtype,
+                ).save(data)
+                converted.append(target)
+        if remove_source:
+            source.unlink()
+
+    if metadata_dir is not None:
+        # Partitions converted before their metadata was split out
+        for target in sorted(target_dir.glob('*.{}'.format(file_format))):
+            record = record_path(target.stem)
+            columns = [
+                column for column in columnar_columns(target, file_format)
+                if column in SGS_METADATA
+            ]
+            if columns and not record.exists():
+                _, metadata = split_sgs_metadata(ColumnarDataSet(
+                    str(target), file_format=file_format, columns=columns,
+                ).load())
+                save_metadata_record(metadata, record)
+
+    return converted
+
+
+def split_sgs_metadata(
+        data: pd.DataFrame,
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    '''
+    Splits the SGS metadata columns of a legacy partition, which repeat
+    the same value on every row, from its time series. Returns the time
+    series and the metadata values of the first row.
+    '''
+    columns = [column for column in SGS_METADATA if column in data.columns]
+    metadata = {
+        column: to_python_value(data[column].iloc[0])
+        for column in columns
+    } if len(data) else {}
+
+    return data.drop(columns=columns), metadata
+
+
+def save_metadata_record(metadata: Dict[str, Any], filepath: Path) -> None:
+    '''
+    Writes a metadata record as JSON, unless it is empty.
+    '''
+    if not metadata:
+        return
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(filepath), 'w') as record_file:
+        json.dump(metadata, record_file)
+
+
+def columnar_columns(filepath: Path, file_format: str = 'parquet') -> List[str]:
+    '''
+    Returns the column names of a Parquet or Feather file, read from its
+    schema only.
+    '''
+    if file_format == 'parquet':
+        return pq.read_schema(str(filepath)).names
+
+    return pa.ipc.open_file(str(filepath)).schema.names
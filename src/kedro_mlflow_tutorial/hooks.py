@@ -27,11 +27,12 @@
 # limitations under the License.
 
 """Project hooks."""
-from typing import Any, Dict, Iterable, Optional
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional
 
 from kedro.config import ConfigLoader
 from kedro.framework.hooks import hook_impl
-from kedro.io import DataCatalog
+from kedro.io import DataCatalog, LambdaDataSet
 from kedro.pipeline import Pipeline
 from kedro.versioning import Journal
 
@@ -56,6 +57,7 @@ class ProjectHooks:
         return {
             "di": data_integration_pipeline,
             "de": data_engineering_pipeline,
+            "de_fused": de.create_pipeline(fused=True),
             "ds": data_science_pipeline,
             "__default__": (
                 data_integration_pipeline
@@ -77,9 +79,36 @@ class ProjectHooks:
         save_version: str,
         journal: Journal,
     ) -> DataCatalog:
-        return DataCatalog.from_config(
+        data_catalog = DataCatalog.from_config(
             catalog, credentials, load_versions, save_version, journal
         )
+        # Listed from the catalog itself, so the incremental download
+        # follows wherever and however sgs_dataset is stored. A partition
+        # missing its metadata record is downloaded again.
+        data_catalog.add(
+            "sgs_existing_partitions",
+            LambdaDataSet(
+                load=partial(
+                    saved_partition_ids,
+                    data_catalog,
+                    "sgs_dataset",
+                    "sgs_metadata",
+                ),
+                save=None,
+            ),
+        )
+        return data_catalog
+
+
+def saved_partition_ids(catalog: DataCatalog, *data_set_names: str) -> List[str]:
+    """Returns the ids of the partitions saved in every one of the given
+    partitioned datasets. Their partitions are listed, not loaded.
+    """
+    saved = [
+        set(catalog.load(name)) if catalog.exists(name) else set()
+        for name in data_set_names
+    ]
+    return sorted(set.intersection(*saved))
 
 
 project_hooks = ProjectHooks()
@@ -1,35 +1,113 @@
+import os
 import math as mt
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
 from typing import Tuple, Dict, Callable, Any, List, Union
 from kedro_mlflow_tutorial.utils.estimator import estimate_natural_period
+from kedro_mlflow_tutorial.utils.statistics import (
+    CHUNK_SIZE,
+    channel_statistics,
+)
+
+# Thread count environment variables of the BLAS and OpenMP runtimes
+THREAD_COUNT_VARIABLES = [
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+]
 
 
 def transform_coordinates(
         partitioned_input: Dict[str, Callable[[], Any]],
-    ) -> Dict[str, pd.DataFrame]:
+        lazy: bool = False,
+        dtype: str = 'float64',
+        mode: str = 'yaw',
+    ) -> Dict[str, Union[pd.DataFrame, Callable[[], pd.DataFrame]]]:
+    '''
+    Transforms every partition of a partitioned dataset from absolute to
+    local coordinates (see `apply_rotation_matrix`).
+
+    Parameters:
+        partitioned_input (Dict[str, Callable[[], Any]]): kedro partitioned
+            dataset, which is dict of callables.
+        lazy (:obj:`bool`, optional): if True, returns a dict of callables
+            that load and rotate each partition on demand instead of the
+            rotated DataFrames. Saved with a `LazyPartitionedDataSet`
+            or `NpyPartitionedDataSet`, only one partition is held in
+            memory at a time.
+        dtype (:obj:`str`, optional): float type of the rotated
+            partitions, e.g. 'float32'
+        mode (:obj:`str`, optional): rotation mode, 'yaw' or 'full'
+            (see `apply_rotation_matrix`)
+
+    Returns:
+
+        (Dict[str, pd.DataFrame]): rotated partitions, or callables
+            returning them if lazy
+    '''
+
+    if lazy:
+        return {
+            partition_key: partial(
+                transform_partition, partition_load_func, dtype, mode
+            )
+            for partition_key, partition_load_func in sorted(
+                partitioned_input.items()
+            )
+        }
 
     result = {}
 
     for partition_key, partition_load_func in tqdm(
             sorted(partitioned_input.items())
         ):
-        partition_data = partition_load_func()  # load the actual partition data
-        result[partition_key] = apply_rotation_matrix(
-            partition_data['x'].values,
-            partition_data['y'].values,
-            partition_data['z'].values,
-            partition_data['xx'].values,
-            partition_data['yy'].values,
-            partition_data['zz'].values,
+        result[partition_key] = transform_partition(
+            partition_load_func, dtype, mode
         )
 
     return result
 
 
+def transform_partition(
+        partition_load_func: Callable[[], Any],
+        dtype: str = 'float64',
+        mode: str = 'yaw',
+    ) -> Union[pd.DataFrame, Dict[str, np.ndarray]]:
+    '''
+    Loads a single partition and transforms it to local coordinates.
+    A DataFrame partition gives a DataFrame, while a partition loaded
+    as a dict of arrays (e.g. memory-mapped columns) gives a dict of
+    arrays, so no DataFrame is ever built for it.
+    '''
+    partition_data = partition_load_func()  # load the actual partition data
+
+    return apply_rotation_matrix(
+        np.asarray(partition_data['x']),
+        np.asarray(partition_data['y']),
+        np.asarray(partition_data['z']),
+        np.asarray(partition_data['xx']),
+        np.asarray(partition_data['yy']),
+        np.asarray(partition_data['zz']),
+        as_frame = isinstance(partition_data, pd.DataFrame),
+        dtype = dtype,
+        mode = mode,
+    )
+
+
+# Columns of a partition in local coordinates
+ROTATED_COLUMNS = ['x', 'y', 'z', 'roll', 'pitch', 'yaw']
+
+# 'yaw' rotates X and Y around the vertical axis only, 'full' applies
+# the whole roll/pitch/yaw rotation to X, Y and Z
+ROTATION_MODES = ['yaw', 'full']
+
+
 def apply_rotation_matrix(
         X: np.ndarray,
         Y: np.ndarray,
@@ -37,12 +115,25 @@ def apply_rotation_matrix(
         XX: np.ndarray,
         YY: np.ndarray,
         ZZ: np.ndarray,
-        ignore_size: int = 500
-    ) -> np.ndarray:
+        ignore_size: int = 500,
+        as_frame: bool = True,
+        dtype: Union[str, np.dtype] = np.float64,
+        out: Dict[str, np.ndarray] = None,
+        mode: str = 'yaw',
+    ) -> Union[pd.DataFrame, Dict[str, np.ndarray]]:
     '''
     Applies the rotation matrix to transform absolute coordinates to
     local coordinates.
 
+    The transient is sliced off before anything is computed, the yaw
+    trigonometric functions are evaluated once and the results are
+    written in place, so only the outputs and two work arrays are
+    allocated when as_frame is False. The DataFrame returned otherwise
+    copies the outputs into a single block, doubling their memory
+    while it is built. The inputs may also be (partitions, samples)
+    arrays of many equal length partitions stacked together, rotated
+    at once.
+
         Parameters:
             X (np.ndarray): X in absolute coordinates
             Y (np.ndarray): Y in absolute coordinates
@@ -53,28 +144,182 @@ def apply_rotation_matrix(
             ignore_size (:obj:`int`, optional): Steps to ignore in the
                 beggining of the series to remove transitive effects.
                 Default value is 500 points
+            as_frame (:obj:`bool`, optional): whether to return a
+                DataFrame or a dict of arrays. Stacked partitions are
+                always returned as a dict of arrays
+            dtype (:obj:`Union[str, np.dtype]`, optional): float type of
+                the results, in which the trigonometric functions are
+                evaluated, e.g. float32 to halve the memory traffic
+            out (:obj:`Dict[str, np.ndarray]`, optional): preallocated
+                arrays of the sliced shape, keyed like the results,
+                to write the results into
+            mode (:obj:`str`, optional): 'yaw' only rotates X and Y by
+                the yaw, 'full' rotates X, Y and Z by the roll, pitch
+                and yaw (see `rotate_to_local`)
 
         Returns:
-            rotated (np.ndarray): local coordinates
+            rotated (pd.DataFrame): local coordinates
     '''
+    if mode not in ROTATION_MODES:
+        raise ValueError(
+            'Unknown rotation mode {!r}, expected one of {}'.format(
+                mode, ROTATION_MODES
+            )
+        )
+
+    #Ignore the first points due to transitions effects
+    X, Y, Z, XX, YY, ZZ = (
+        np.asarray(values)[..., ignore_size:]
+        for values in (X, Y, Z, XX, YY, ZZ)
+    )
+
+    dtype = np.dtype(dtype)
+    if out is None:
+        out = {column: np.empty(X.shape, dtype) for column in ROTATED_COLUMNS}
+
     # Transform roll, pitch, and yaw to radians
-    roll = (XX*mt.pi)/180
-    pitch = (YY*mt.pi)/180
-    yaw = (ZZ*mt.pi)/180
+    to_radians = dtype.type(mt.pi / 180)
+    roll = np.multiply(XX, to_radians, out=out['roll'], casting='unsafe')
+    pitch = np.multiply(YY, to_radians, out=out['pitch'], casting='unsafe')
+    yaw = np.multiply(ZZ, to_radians, out=out['yaw'], casting='unsafe')
+
+    x, y, z = out['x'], out['y'], out['z']
+    if mode == 'full':
+        rotate_to_local(X, Y, Z, roll, pitch, yaw, out=(x, y, z))
+    else:
+        # Apply rotation matrix to X and Y
+        cos_yaw = np.cos(yaw)
+        sin_yaw = np.sin(yaw)
+        np.multiply(X, cos_yaw, out=x, casting='unsafe')
+        np.multiply(Y, cos_yaw, out=cos_yaw, casting='unsafe')
+        np.multiply(Y, sin_yaw, out=y, casting='unsafe')
+        x += y
+        np.multiply(X, sin_yaw, out=sin_yaw, casting='unsafe')
+        np.subtract(cos_yaw, sin_yaw, out=y)
+
+        np.copyto(z, Z, casting='unsafe')
+
+    rotated = {
+        'x': x,
+        'y': y,
+        'z': z,
+        'roll': roll,
+        'pitch': pitch,
+        'yaw': yaw,
+    }
+
+    return pd.DataFrame(rotated) if as_frame and x.ndim == 1 else rotated
+
+
+def rotation_matrices(
+        roll: np.ndarray,
+        pitch: np.ndarray,
+        yaw: np.ndarray,
+        out: np.ndarray = None,
+    ) -> np.ndarray:
+    '''
+    Builds the rotation matrix of every sample from the local to the
+    absolute frame, R = Rz(yaw) Ry(pitch) Rx(roll), in radians.
 
-    # Apply rotation matrix to X and Y
-    x = X * np.cos(yaw) + Y * np.sin(yaw)
-    y = -X * np.sin(yaw) + Y * np.cos(yaw)
+        Parameters:
+            roll (np.ndarray): roll angles
+            pitch (np.ndarray): pitch angles
+            yaw (np.ndarray): yaw angles
+            out (:obj:`np.ndarray`, optional): (3, 3, ...) array to
+                write the matrices into
 
-    #Ignore the first points due to transitions effects
-    return pd.DataFrame({
-        'x': x[ignore_size:],
-        'y': y[ignore_size:],
-        'z': Z[ignore_size:],
-        'roll': roll[ignore_size:],
-        'pitch': pitch[ignore_size:],
-        'yaw': yaw[ignore_size:],
-    })
+        Returns:
+            R (np.ndarray): (3, 3, ...) array, R[i, j] being the
+                element (i, j) of the matrix of each sample
+    '''
+    if out is None:
+        out = np.empty((3, 3) + np.shape(roll), np.result_type(roll, 0.0))
+
+    cos_roll, sin_roll = np.cos(roll), np.sin(roll)
+    cos_pitch, sin_pitch = np.cos(pitch), np.sin(pitch)
+    cos_yaw, sin_yaw = np.cos(yaw), np.sin(yaw)
+
+    np.multiply(cos_yaw, cos_pitch, out=out[0, 0])
+    np.multiply(sin_yaw, cos_pitch, out=out[1, 0])
+    np.negative(sin_pitch, out=out[2, 0])
+    np.multiply(cos_pitch, sin_roll, out=out[2, 1])
+    np.multiply(cos_pitch, cos_roll, out=out[2, 2])
+
+    # The products of sin(pitch) are reused by the remaining elements
+    work = cos_pitch
+    sin_pitch_sin_roll = np.multiply(sin_pitch, sin_roll)
+    sin_pitch_cos_roll = np.multiply(sin_pitch, cos_roll, out=sin_pitch)
+
+    np.multiply(cos_yaw, sin_pitch_sin_roll, out=out[0, 1])
+    out[0, 1] -= np.multiply(sin_yaw, cos_roll, out=work)
+    np.multiply(cos_yaw, sin_pitch_cos_roll, out=out[0, 2])
+    out[0, 2] += np.multiply(sin_yaw, sin_roll, out=work)
+    np.multiply(sin_yaw, sin_pitch_sin_roll, out=out[1, 1])
+    out[1, 1] += np.multiply(cos_yaw, cos_roll, out=work)
+    np.multiply(sin_yaw, sin_pitch_cos_roll, out=out[1, 2])
+    out[1, 2] -= np.multiply(cos_yaw, sin_roll, out=work)
+
+    return out
+
+
+def rotate_to_local(
+        X: np.ndarray,
+        Y: np.ndarray,
+        Z: np.ndarray,
+        roll: np.ndarray,
+        pitch: np.ndarray,
+        yaw: np.ndarray,
+        out: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        chunk_size: int = 1 << 12,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Rotates absolute coordinates to the local frame with the full
+    roll/pitch/yaw rotation, p_local = R^T p for each sample (see
+    `rotation_matrices`), written into the out (x, y, z) arrays.
+
+    The matrices of a chunk of samples are built and applied with a
+    single einsum before moving to the next chunk, so they stay in the
+    CPU cache and are never allocated for the whole series.
+    '''
+    x, y, z = out
+    n_samples = x.shape[-1]
+    step = min(chunk_size, max(n_samples, 1))
+    points = np.empty((3,) + x.shape[:-1] + (step,), x.dtype)
+    local = np.empty_like(points)
+    matrices = np.empty((3, 3) + points.shape[1:], x.dtype)
+
+    for start in range(0, n_samples, step):
+        samples = (Ellipsis, slice(start, start + step))
+        size = len(range(start, min(start + step, n_samples)))
+        chunk = (slice(None), Ellipsis, slice(0, size))
+
+        for i, values in enumerate((X, Y, Z)):
+            np.copyto(points[i][..., :size], values[samples], casting='unsafe')
+        rotation_matrices(
+            roll[samples], pitch[samples], yaw[samples],
+            out=matrices[(slice(None),) + chunk],
+        )
+        np.einsum(
+            'ji...,j...->i...',
+            matrices[(slice(None),) + chunk],
+            points[chunk],
+            out=local[chunk],
+        )
+        for i, values in enumerate((x, y, z)):
+            values[samples] = local[i][..., :size]
+
+    return x, y, z
+
+
+def single_threaded_worker() -> None:
+    '''
+    Initializer of the generate_feature_data workers. The processes
+    already run in parallel, a multithreaded BLAS in each of them would
+    oversubscribe the cores.
+    '''
+    for variable in THREAD_COUNT_VARIABLES:
+        os.environ[variable] = '1'
+    threadpool_limits(limits=1)
 
 
 def generate_feature_data(
@@ -84,6 +329,11 @@ def generate_feature_data(
         delta: float,
         repetitions: int,
         window_size: int,
+        engine: str = 'loop',
+        n_workers: int = 1,
+        partitioned_metadata: Dict[str, Callable[[], Dict]] = None,
+        metadata_columns: List[str] = None,
+        statistics: Dict[str, Any] = None,
     ) -> pd.DataFrame:
     '''
     Generates the master table for training the regressor model, given
@@ -101,66 +351,258 @@ def generate_feature_data(
             each window extracted from the time serie.
         window_size (int): size of the window extracted from
             the time serie.
+        engine (:obj:`str`, optional): spectral engine used by the
+            Welch's Method estimator ('loop', 'batched', 'analytic',
+            'sliding' or 'band').
+        n_workers (:obj:`int`, optional): number of worker processes.
+            The partitions are loaded and processed inside the workers,
+            so only one partition per worker is held in memory, and
+            each worker runs the BLAS on a single thread. None uses all
+            the available CPUs, 1 or less runs in this process.
+        partitioned_metadata (:obj:`Dict[str, Callable[[], Dict]]`,
+            optional): kedro partitioned dataset of the scalar metadata
+            of each partition, joined to the generated data.
+        metadata_columns (:obj:`List[str]`, optional): metadata fields
+            to join. None joins all of them.
+        statistics (:obj:`Dict[str, Any]`, optional): keyword arguments
+            of `calculate_position_statistics` (extra_statistics,
+            percentiles and chunk_size).
 
     Returns:
 
-        (pd.DataFrame): generated data
+        (pd.DataFrame): generated data, one row per partition sorted
+            by partition key
 
 
     '''
 
-    result = []
+    partition_keys, partition_load_funcs = zip(
+        *sorted(partitioned_input.items())
+    ) if partitioned_input else ((), ())
+
+    generate_partition = partial(
+        generate_partition_feature_data,
+        expected_tp = expected_tp,
+        target_column = target_column,
+        delta = delta,
+        repetitions = repetitions,
+        window_size = window_size,
+        engine = engine,
+        statistics = statistics,
+    )
 
-    for partition_key, partition_load_func in tqdm(
-            sorted(partitioned_input.items())
-        ):
-        # Initializes regressor_data dict and sets partition key
-        master_data = dict()
-        master_data['partition_key'] = partition_key
-
-        # Loading data with the partition function
-        if isinstance(partition_load_func, pd.DataFrame):
-            partition_data = partition_load_func
-        else:
-            partition_data = partition_load_func()
-
-        # Calculating statistics
-        statistics_data = calculate_position_statistics(partition_data)
-        master_data = {**master_data, **statistics_data}
-
-        # Calculating natural period
-        master_data[target_column], _, _, _, _ =  estimate_natural_period(
-            time_serie = partition_data[target_column.replace('tp_','')].values,
-            expected_tp = expected_tp,
-            delta = delta,
-            repetitions = repetitions,
-            window_size = window_size,
+    if n_workers is not None and n_workers <= 1:
+        result = [
+            generate_partition(partition_key, partition_load_func)
+            for partition_key, partition_load_func in tqdm(
+                zip(partition_keys, partition_load_funcs),
+                total=len(partition_keys),
+            )
+        ]
+    else:
+        # map yields the rows in submission order, keeping them sorted
+        with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=single_threaded_worker,
+                ) as executor:
+            result = list(tqdm(
+                executor.map(
+                    generate_partition,
+                    partition_keys,
+                    partition_load_funcs,
+                ),
+                total=len(partition_keys),
+            ))
+
+    feature_data = pd.DataFrame(result)
+
+    if partitioned_metadata:
+        feature_data = feature_data.merge(
+            load_partition_metadata(partitioned_metadata, metadata_columns),
+            on = 'partition_key',
+            how = 'left',
+        )
+
+    return feature_data
+
+
+def load_partition_metadata(
+        partitioned_metadata: Dict[str, Callable[[], Dict]],
+        metadata_columns: List[str] = None,
+    ) -> pd.DataFrame:
+    '''
+    Loads the scalar metadata records of a partitioned dataset into a
+    table with one row per partition key.
+    '''
+    metadata = pd.DataFrame([
+        {'partition_key': partition_key, **partition_load_func()}
+        for partition_key, partition_load_func in sorted(
+            partitioned_metadata.items()
+        )
+    ])
+
+    if metadata_columns is not None:
+        metadata = metadata.reindex(
+            columns=['partition_key'] + list(metadata_columns)
         )
 
-        # Append generated data to final result
-        result.append(master_data)
+    return metadata
+
+
+def generate_raw_feature_data(
+        partitioned_input: Dict[str, Callable[[], Any]],
+        expected_tp: float,
+        target_column: 'str',
+        delta: float,
+        repetitions: int,
+        window_size: int,
+        engine: str = 'loop',
+        n_workers: int = 1,
+        partitioned_metadata: Dict[str, Callable[[], Dict]] = None,
+        metadata_columns: List[str] = None,
+        statistics: Dict[str, Any] = None,
+        dtype: str = 'float64',
+        mode: str = 'yaw',
+    ) -> pd.DataFrame:
+    '''
+    Fused version of `transform_coordinates` and `generate_feature_data`:
+    every raw partition is loaded, rotated to local coordinates and
+    reduced to its feature row in a single pass, without persisting the
+    rotated partition. See `generate_feature_data` for the parameters
+    and `transform_coordinates` for dtype and mode.
+
+    Returns:
+
+        (pd.DataFrame): generated data, one row per partition sorted
+            by partition key
+    '''
+
+    return generate_feature_data(
+        transform_coordinates(
+            partitioned_input, lazy=True, dtype=dtype, mode=mode
+        ),
+        expected_tp = expected_tp,
+        target_column = target_column,
+        delta = delta,
+        repetitions = repetitions,
+        window_size = window_size,
+        engine = engine,
+        n_workers = n_workers,
+        partitioned_metadata = partitioned_metadata,
+        metadata_columns = metadata_columns,
+        statistics = statistics,
+    )
+
 
-    return pd.DataFrame(result)
+def generate_partition_feature_data(
+        partition_key: str,
+        partition_load_func: Union[Callable[[], Any], pd.DataFrame],
+        expected_tp: float,
+        target_column: 'str',
+        delta: float,
+        repetitions: int,
+        window_size: int,
+        engine: str = 'loop',
+        statistics: Dict[str, Any] = None,
+    ) -> Dict[str, Any]:
+    '''
+    Generates the master table row of a single partition. See
+    `generate_feature_data` for the parameters.
+
+    Returns:
+
+        (dict): partition key, statistics and natural period of the
+            partition
+    '''
+    # Initializes regressor_data dict and sets partition key
+    master_data = dict()
+    master_data['partition_key'] = partition_key
+
+    # Loading data with the partition function
+    if callable(partition_load_func):
+        partition_data = partition_load_func()
+    else:
+        partition_data = partition_load_func
+
+    # Calculating statistics
+    statistics_data = calculate_position_statistics(
+        partition_data, **(statistics or {})
+    )
+    master_data = {**master_data, **statistics_data}
+
+    # Calculating natural period
+    master_data[target_column], _, _, _, _ =  estimate_natural_period(
+        time_serie = np.asarray(partition_data[target_column.replace('tp_','')]),
+        expected_tp = expected_tp,
+        delta = delta,
+        repetitions = repetitions,
+        window_size = window_size,
+        engine = engine,
+        lazy_figures = True,
+    )
+
+    return master_data
+
+
+# Rotated channels described by calculate_position_statistics
+POSITION_COLUMNS = ['x', 'y', 'z', 'roll', 'pitch', 'yaw']
+
+# Feature name prefix of each statistic, 'off' being the offset (mean)
+STATISTIC_PREFIXES = {
+    'mean': 'off',
+    'std': 'std',
+    'skew': 'skew',
+    'kurtosis': 'kurt',
+    'min': 'min',
+    'max': 'max',
+}
 
 
 def calculate_position_statistics(
-        data: pd.DataFrame,
-    ):
+        data: Union[pd.DataFrame, Dict[str, np.ndarray]],
+        extra_statistics: List[str] = (),
+        percentiles: List[float] = (),
+        chunk_size: int = CHUNK_SIZE,
+    ) -> Dict[str, float]:
+    '''
+    Calculates the offset (mean) and standard deviation of every position
+    channel, plus optional extra statistics, for all channels at once
+    (see `channel_statistics`).
+
+    Parameters:
+        data (Union[pd.DataFrame, Dict[str, np.ndarray]]): rotated
+            partition
+        extra_statistics (:obj:`List[str]`, optional): any of 'skew',
+            'kurtosis', 'min' and 'max'
+        percentiles (:obj:`List[float]`, optional): percentiles of each
+            channel, named 'p<q>_<channel>'
+        chunk_size (:obj:`int`, optional): samples per chunk over which
+            the moments are accumulated, so memory-mapped partitions
+            are read chunk by chunk and never loaded whole. None reduces
+            the whole partition at once
+
+    Returns:
+
+        (dict): one feature per statistic and channel, e.g. 'off_x'
+    '''
+    statistics = ['mean', 'std'] + [
+        statistic for statistic in extra_statistics
+        if statistic not in ('mean', 'std')
+    ]
+
+    values = channel_statistics(
+        [np.asarray(data[column]) for column in POSITION_COLUMNS],
+        statistics,
+        percentiles,
+        chunk_size,
+    )
 
     return {
-        'off_x': np.mean(data['x'].values),
-        'off_y': np.mean(data['y'].values),
-        'off_z': np.mean(data['z'].values),
-        'off_roll': np.mean(data['roll'].values),
-        'off_pitch': np.mean(data['pitch'].values),
-        'off_yaw': np.mean(data['yaw'].values),
-        'std_x': np.std(data['x'].values),
-        'std_y': np.std(data['y'].values),
-        'std_z': np.std(data['z'].values),
-        'std_roll': np.std(data['roll'].values),
-        'std_pitch': np.std(data['pitch'].values),
-        'std_yaw': np.std(data['yaw'].values),
-   }
+        '{}_{}'.format(STATISTIC_PREFIXES.get(name, name), column):
+            float(value[i])
+        for name, value in values.items()
+        for i, column in enumerate(POSITION_COLUMNS)
+    }
 
 
 def generate_training_data(
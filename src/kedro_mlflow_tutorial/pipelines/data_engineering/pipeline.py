@@ -37,35 +37,86 @@ from kedro.pipeline import Pipeline, node
 from kedro_mlflow_tutorial.pipelines.data_engineering.nodes import (
     transform_coordinates,
     generate_feature_data,
+    generate_raw_feature_data,
     generate_training_data,
 )
 
 
-def create_pipeline(**kwargs):
-    return Pipeline(
-        [
+ESTIMATOR_PARAMS = [
+    "params:estimator.expected_tp",
+    "params:estimator.target_column",
+    "params:estimator.delta",
+    "params:estimator.repetitions",
+    "params:estimator.window_size",
+    "params:estimator.engine",
+    "params:estimator.n_workers",
+]
+
+# Run metadata joined to the feature table and position statistics
+FEATURE_INPUTS = [
+    "sgs_metadata",
+    "params:features.metadata",
+    "params:features.statistics",
+]
+
+# Rotation of the raw partitions to local coordinates
+TRANSFORM_PARAMS = [
+    "params:transform.dtype",
+    "params:transform.mode",
+]
+
+
+def create_pipeline(fused: bool = False, **kwargs):
+    """Creates the data engineering pipeline.
+
+    Args:
+        fused: if True, goes from ``sgs_dataset`` straight to
+            ``feature_dataset`` in a single node, without persisting
+            ``transformed_sgs_dataset``.
+
+    """
+    if fused:
+        feature_nodes = [
+            node(
+                func=generate_raw_feature_data,
+                inputs=(
+                    ["sgs_dataset"]
+                    + ESTIMATOR_PARAMS
+                    + FEATURE_INPUTS
+                    + TRANSFORM_PARAMS
+                ),
+                outputs="feature_dataset",
+                name="generate_raw_feature_data",
+                tags="data_engineering"
+            ),
+        ]
+    else:
+        feature_nodes = [
             node(
                 func=transform_coordinates,
-                inputs="sgs_dataset",
+                inputs=(
+                    ["sgs_dataset", "params:transform.lazy"]
+                    + TRANSFORM_PARAMS
+                ),
                 outputs="transformed_sgs_dataset",
                 name="transform_coordinates",
                 tags="data_engineering"
             ),
             node(
                 func=generate_feature_data,
-                inputs=[
-                    "transformed_sgs_dataset",
-                    "params:estimator.expected_tp",
-                    "params:estimator.target_column",
-                    "params:estimator.delta",
-                    "params:estimator.repetitions",
-                    "params:estimator.window_size",
-                ],
+                inputs=(
+                    ["transformed_sgs_dataset"]
+                    + ESTIMATOR_PARAMS
+                    + FEATURE_INPUTS
+                ),
                 outputs="feature_dataset",
                 name="generate_feature_data",
                 tags="data_engineering"
             ),
+        ]
 
+    return Pipeline(
+        feature_nodes + [
             node(
                 func=generate_training_data,
                 inputs=[
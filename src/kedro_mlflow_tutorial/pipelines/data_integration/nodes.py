@@ -1,9 +1,17 @@
 import os
-from typing import Dict, List, Iterable
+import time
+import logging
+import pandas as pd
+from functools import partial
+from typing import Dict, List, Iterable, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from kedro.config import ConfigLoader
 from kedro_mlflow_tutorial.utils.tpn import TPNFileServer
+from kedro_mlflow_tutorial.utils.cache import FileCache
 from kedro.config import ConfigLoader
 
+logger = logging.getLogger(__name__)
+
 
 def get_credentials(project_path: str) -> Dict:
     conf_paths = [
@@ -21,7 +29,18 @@ def download_sgs_data(credentials: Dict,
                      sgs_params: Dict,
                      tpn_params: Dict,
                      project_path: str,
-                ) -> Dict:
+                     existing_partitions: Iterable[str] = (),
+                ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict], Dict]:
+    '''
+    Downloads the planned SGS files. Returns the time series partitions
+    and, keyed by the same partition ids, the scalar metadata of each
+    run, which is stored once per partition instead of on every row.
+    The timing and byte counters of the download are logged as a summary
+    table and returned as MLflow metrics.
+    In incremental mode, the partitions in existing_partitions (the ids
+    already saved in both sgs_dataset and sgs_metadata) are not
+    downloaded again.
+    '''
 
     sgs_base_path = sgs_params['base_path']
     session_ids = sgs_params['download']['session_ids']
@@ -32,10 +51,19 @@ def download_sgs_data(credentials: Dict,
     start_env_id = sgs_params['download']['env_cond']['start_id']
     end_env_id = sgs_params['download']['env_cond']['end_id']
     env_step = sgs_params['download']['env_cond']['step']
+    parallelism = sgs_params['download'].get('parallelism', 1)
+    incremental = sgs_params['download'].get('incremental', False)
+    cache_params = sgs_params['download'].get('cache') or {}
+    spill_threshold = sgs_params['download'].get('spill_threshold')
+    columns = sgs_params['download'].get('columns')
+    metadata_fields = sgs_params['download'].get('metadata')
+    samples = sgs_params['download'].get('samples')
+    range_block_size = sgs_params['download'].get('range_block_size')
 
     server_ip = tpn_params['server_ip']
     domain_name = tpn_params['domain_name']
     shared_folder = tpn_params['shared_folder']
+    pool_size = tpn_params.get('pool_size', 1)
 
 
     iterable = define_download_data(
@@ -47,23 +75,189 @@ def download_sgs_data(credentials: Dict,
         env_step = env_step,
     )
 
+    if incremental:
+        # Only fetch the partitions missing from the dataset. They are
+        # saved next to the existing ones, which are left untouched.
+        existing = set(existing_partitions)
+        planned = len(iterable)
+        iterable = [
+            (session_id, env_id) for session_id, env_id in iterable
+            if sgs_partition_id(session_id, env_id) not in existing
+        ]
+        logger.info(
+            '%d of %d SGS partitions already downloaded, fetching %d',
+            planned - len(iterable), planned, len(iterable)
+        )
+
+    # A single client reuses its pooled connections for every file
+    tpn_client = TPNFileServer(
+        credentials['tpn']['username'],
+        credentials['tpn']['password'],
+        server_ip,
+        domain_name,
+        shared_folder,
+        sgs_base_path,
+        pool_size = max(pool_size, parallelism),
+        cache = FileCache(
+            os.path.join(project_path, cache_params['dir']),
+            cache_params.get('max_bytes'),
+        ) if cache_params.get('dir') else None,
+        spill_threshold = spill_threshold,
+        columns = columns,
+        metadata = metadata_fields,
+        samples = tuple(samples) if samples else None,
+        range_block_size = range_block_size,
+    )
+    download = partial(
+        download_sgs_file,
+        username = credentials['tpn']['username'],
+        password = credentials['tpn']['password'],
+        server_ip = server_ip,
+        domain_name = domain_name,
+        shared_folder = shared_folder,
+        sgs_base_path = sgs_base_path,
+        project_path = project_path,
+        download_dir = download_dir,
+        tpn_client = tpn_client,
+    )
+
+    # Files are downloaded and decoded concurrently by `parallelism`
+    # threads, each one with its own pooled connection
     data = {}
-    for session_id, env_id in iterable:
-        df, filename = download_sgs_file(
-            session_id = session_id,
-            env_condition_id = env_id,
-            username = credentials['tpn']['username'],
-            password = credentials['tpn']['password'],
-            server_ip = server_ip,
-            domain_name = domain_name,
-            shared_folder = shared_folder,
-            sgs_base_path = sgs_base_path,
-            project_path = project_path,
-            download_dir = download_dir
+    partition_metadata = {}
+    downloaded = {}
+    failed = []
+    start = time.perf_counter()
+    with tpn_client, ThreadPoolExecutor(max_workers=parallelism) as executor:
+        futures = [
+            (session_id, env_id, executor.submit(
+                download,
+                session_id = session_id,
+                env_condition_id = env_id,
+            ))
+            for session_id, env_id in iterable
+        ]
+        for session_id, env_id, future in futures:
+            try:
+                df, run_metadata, _ = future.result()
+            except Exception:
+                # A failed file must not abort the whole batch
+                logger.exception(
+                    'Failed to download SGS session %s, environment '
+                    'condition %s', session_id, env_id
+                )
+                failed.append((session_id, env_id))
+                continue
+            partition_id = sgs_partition_id(session_id, env_id)
+            data[partition_id] = df
+            partition_metadata[partition_id] = run_metadata
+            downloaded[partition_id] = tpn_client.stats.file(
+                tpn_client.sgsFilePath(session_id, env_id)
+            )
+    wall_time = time.perf_counter() - start
+
+    if failed:
+        logger.warning(
+            '%d of %d SGS files failed to download: %s',
+            len(failed), len(futures), failed
         )
-        data[filename] = df
 
-    return data
+    summary = download_summary(downloaded, wall_time)
+    logger.info('SGS download summary:\n%s', summary.to_string())
+
+    metrics = download_metrics(
+        summary, tpn_client.stats.totals, len(failed)
+    )
+
+    return data, partition_metadata, metrics
+
+
+# Per-file counters of TPNFileServer.stats shown in the download summary
+DOWNLOAD_COUNTERS = [
+    'bytes', 'transfer_time', 'decode_time', 'frame_time', 'total_time',
+]
+
+
+def download_summary(downloaded: Dict[str, Dict[str, float]],
+                     wall_time: float) -> pd.DataFrame:
+    '''
+    Builds a table of the counters of each downloaded partition, in
+    seconds and bytes, with its throughput and a last 'total' row. The
+    total time is the wall time of the download, not the sum over the
+    files that were downloaded concurrently.
+    '''
+    summary = pd.DataFrame(
+        list(downloaded.values()), index=list(downloaded)
+    ).reindex(columns=DOWNLOAD_COUNTERS).fillna(0.0)
+    summary.loc['total'] = summary.sum()
+    summary.loc['total', 'total_time'] = wall_time
+
+    summary['throughput_mbps'] = (
+        summary['bytes'] / 1e6 / summary['total_time']
+    ).where(summary['total_time'] > 0, 0.0)
+
+    return summary
+
+
+def download_metrics(summary: pd.DataFrame,
+                     totals: Dict[str, float],
+                     failed_files: int) -> Dict:
+    '''
+    Converts a download summary to MLflow metrics: aggregate counters
+    plus the time and throughput of every file, stepped by file.
+    '''
+    files = summary.drop('total')
+    total = summary.loc['total']
+
+    metrics = {
+        'download_files': {'value': float(len(files)), 'step': 1},
+        'download_failed_files': {'value': float(failed_files), 'step': 1},
+        'download_bytes': {'value': float(total['bytes']), 'step': 1},
+        'download_wall_time': {'value': float(total['total_time']), 'step': 1},
+        'download_throughput_mbps': {
+            'value': float(total['throughput_mbps']),
+            'step': 1,
+        },
+        'download_connections': {
+            'value': float(totals.get('connections', 0)),
+            'step': 1,
+        },
+        'download_connect_time': {
+            'value': float(totals.get('connect_time', 0)),
+            'step': 1,
+        },
+    }
+    for counter in ['transfer_time', 'decode_time', 'frame_time']:
+        metrics['download_' + counter] = {
+            'value': float(total[counter]),
+            'step': 1,
+        }
+
+    if len(files):
+        metrics['download_file_time'] = [
+            {'value': float(value), 'step': step}
+            for step, value in enumerate(files['total_time'], 1)
+        ]
+        metrics['download_file_throughput_mbps'] = [
+            {'value': float(value), 'step': step}
+            for step, value in enumerate(files['throughput_mbps'], 1)
+        ]
+
+    return metrics
+
+
+def sgs_partition_id(session_id: int,
+                     env_condition_id: int,
+                     filetype: str = 'pos') -> str:
+    '''
+    Returns the sgs_dataset partition id of a SGS file. Partition ids
+    have no extension, the catalog sets the file suffix.
+    '''
+    return '{}_{}_{}'.format(
+        session_id,
+        str(env_condition_id).zfill(4),
+        filetype,
+    )
 
 
 def define_download_data(
@@ -87,7 +281,7 @@ def define_download_data(
     iterable = []
     if mode == 'std' and env_ids:
         iterable = [(i,j) for i in session_ids
-                            for j in env_id]
+                            for j in env_ids]
 
     elif (mode == 'sparse'
           and start_env_id is not None
@@ -109,16 +303,19 @@ def download_sgs_file(session_id: int,
                     sgs_base_path: str,
                     project_path: str,
                     download_dir: str = 'data/01_raw/sgs',
-                    file_only: bool = True) -> str:
+                    file_only: bool = True,
+                    tpn_client: TPNFileServer = None,
+                    ) -> Tuple[pd.DataFrame, Dict, str]:
 
-    tpn_client = TPNFileServer(
-        username,
-        password,
-        server_ip,
-        domain_name,
-        shared_folder,
-        sgs_base_path
-    )
+    if tpn_client is None:
+        tpn_client = TPNFileServer(
+            username,
+            password,
+            server_ip,
+            domain_name,
+            shared_folder,
+            sgs_base_path
+        )
 
     if file_only:
         data_dir = download_dir
@@ -133,7 +330,7 @@ def download_sgs_file(session_id: int,
         data_dir
     )
 
-    return tpn_client.downloadSGSDataAsDataFrame(
+    return tpn_client.downloadSGSRun(
         session_id = session_id,
         env_cond_id = env_condition_id,
         output_dir = output_dir,
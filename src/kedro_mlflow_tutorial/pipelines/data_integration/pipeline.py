@@ -57,8 +57,13 @@ def create_pipeline(**kwargs):
                     "params:sgs",
                     "params:tpn",
                     "params:project_path",
+                    "sgs_existing_partitions",
+                ],
+                outputs=[
+                    "sgs_dataset",
+                    "sgs_metadata",
+                    "sgs_download_metrics",
                 ],
-                outputs="sgs_dataset",
                 name="download_sgs_data",
                 tags='data_integration',
             )
@@ -0,0 +1,165 @@
+import os
+import hashlib
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, IO, Iterator
+
+
+class FileCache:
+    '''
+    On-disk cache of remote files, keyed by the remote path, size and
+    modification time, so a file is fetched again only if it changed
+    on the share. The least recently used files are evicted when the
+    cache grows above max_bytes.
+
+    The directory is scanned once, the sizes and the LRU order of the
+    files are then kept in memory, so a miss does not list the cache
+    again. Files in use (see `pinned`) are never evicted.
+
+        Parameters:
+            directory (str): cache directory, e.g. `data/01_raw/sgs_cache`
+            max_bytes (:obj:`int`, optional): maximum size of the cache.
+                Unbounded if None.
+    '''
+
+    SUFFIX = '.cache'
+
+    def __init__(self, directory: str, max_bytes: int = None) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # Size of the cached files by key, least recently used first,
+        # the access time left by the previous runs gives the order
+        files = sorted(
+            (entry.stat().st_mtime, entry.name, entry.stat().st_size)
+            for entry in os.scandir(str(self.directory))
+            if entry.name.endswith(self.SUFFIX) and entry.is_file()
+        )
+        self._sizes = OrderedDict(
+            (name[:-len(self.SUFFIX)], size) for _, name, size in files
+        )
+        self._total = sum(self._sizes.values())
+
+        # Number of users of each key, whose file must not be evicted
+        self._pins = Counter()
+
+    @staticmethod
+    def key(remote_path: str, size: int, mtime: float) -> str:
+        '''
+        Returns the cache key of a remote file version.
+        '''
+        identity = '{}\0{}\0{!r}'.format(remote_path, size, mtime)
+
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / (key + self.SUFFIX)
+
+    def get(self, key: str) -> Path:
+        '''
+        Returns the path of a cached file, or None on a cache miss.
+        A hit refreshes the file access time used by the LRU eviction.
+        '''
+        with self._lock:
+            return self._touch(key)
+
+    def _touch(self, key: str) -> Path:
+        # Called with the lock held
+        if key not in self._sizes:
+            return None
+
+        path = self.path(key)
+        try:
+            os.utime(str(path))
+        except FileNotFoundError:
+            # Removed behind the back of the cache
+            self._total -= self._sizes.pop(key)
+            return None
+        self._sizes.move_to_end(key)
+
+        return path
+
+    def fetch(self, key: str, write: Callable[[IO], None]) -> Path:
+        '''
+        Returns the cached file of a key, calling write(file) to fill it
+        on a cache miss. The file is written under a temporary name and
+        atomically moved into place, so a failed or concurrent fetch
+        never leaves a partial file behind.
+
+        The file may be evicted by a later fetch as soon as this one
+        returns, use `pinned` to keep it while it is read.
+        '''
+        with self.pinned(key, write) as path:
+            return path
+
+    @contextmanager
+    def pinned(self, key: str, write: Callable[[IO], None]) -> Iterator[Path]:
+        '''
+        Fetches the file of a key like `fetch`, and keeps it in the cache
+        until the context exits, whatever the other threads fetch.
+        '''
+        with self._lock:
+            self._pins[key] += 1
+            path = self._touch(key)
+
+        try:
+            if path is None:
+                path = self._write(key, write)
+            yield path
+        finally:
+            with self._lock:
+                self._pins[key] -= 1
+                if not self._pins[key]:
+                    del self._pins[key]
+
+    def _write(self, key: str, write: Callable[[IO], None]) -> Path:
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.directory), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                write(tmp_file)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, str(self.path(key)))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            # A concurrent fetch of the same key may have added it
+            self._total += size - self._sizes.pop(key, 0)
+            self._sizes[key] = size
+            self._evict()
+
+        return self.path(key)
+
+    def size(self) -> int:
+        return self._total
+
+    def evict(self) -> None:
+        '''
+        Removes the least recently used files until the cache fits in
+        max_bytes. The files in use are never removed.
+        '''
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        # Called with the lock held
+        if self.max_bytes is None or self._total <= self.max_bytes:
+            return
+
+        for key, size in list(self._sizes.items()):
+            if self._total <= self.max_bytes:
+                break
+            if key in self._pins:
+                continue
+            try:
+                self.path(key).unlink()
+            except FileNotFoundError:
+                pass
+            del self._sizes[key]
+            self._total -= size
@@ -2,12 +2,15 @@ import math as mt
 import numpy as np
 import scipy as sci
 import pandas as pd
-import plotly.express as px
-import matplotlib.pyplot as plt
 from tqdm import tqdm
-from matplotlib.figure import Figure
+from functools import partial
 from scipy import signal
-from typing import Tuple, List, Any, Dict, Callable, Union
+from scipy import fft as sp_fft
+from typing import Tuple, List, Any, Dict, Callable, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # matplotlib is only imported when a figure is actually drawn
+    from matplotlib.figure import Figure
 
 
 def window_filter(
@@ -34,23 +37,126 @@ def window_filter(
                 S_filtered (np.ndarray): filtered spectral density vector
     '''
 
-    # Build a data matrix from f and S
-    data = np.transpose(np.array([f,S]))
+    bins = window_filter_bins(f, low_limit, high_limit)
+    f_filtered = f[bins]
+    S_filtered = S[bins]
 
-    # Filtering with low_limit
-    low_filter = data[:,0] >= low_limit
-    filtered_data = data[low_filter]
+    return f_filtered, S_filtered
 
-    # Filtering with high_limit
-    high_filter = filtered_data[:,0] <= high_limit
-    filtered_data = filtered_data[high_filter]
 
-    # Prepare filtered series
-    filtered_data = np.transpose(filtered_data)
-    f_filtered = filtered_data[0]
-    S_filtered = filtered_data[1]
+def window_filter_bins(
+        f: np.ndarray,
+        low_limit: float,
+        high_limit: float
+    ) -> np.ndarray:
+    '''
+    Returns the indices of the frequency vector between a low frequency
+    and a high frequency limits. The indices only depend on the
+    frequency grid, so they can be computed once and reused for every
+    spectrum sharing that grid.
 
-    return f_filtered, S_filtered
+        Parameters:
+            f (np.ndarray): array representing the frequency vector
+            low_limit (float): low frequency limit in Hertz (Hz)
+            high_limit (float): high frequency limit in Hertz (Hz)
+
+        Returns:
+            bins (np.ndarray): indices of the filtered frequencies
+    '''
+
+    return np.flatnonzero((f >= low_limit) & (f <= high_limit))
+
+
+class MomentPlan:
+    '''
+    Precomputed plan to calculate the centered moments of many spectra
+    S(f) sharing the same frequency vector.
+
+    The band [center-delta, center+delta] and the Simpson integration
+    weights of m0 and m2 are computed once, so the moments of a whole
+    batch of spectra are obtained with a single matrix-vector product.
+
+        Parameters:
+            center (float): expected measured frequency value.
+            delta (float): the size of the segment used to filter
+                around the given center [center-delta,center+delta].
+            f (np.ndarray): frequency as an independente variable.
+            time_step (:obj:`int`, optional): integration step
+
+        Attributes:
+            bins (np.ndarray): indices of f inside the band
+            f (np.ndarray): frequencies inside the band
+            weights (np.ndarray): (bins, 2) matrix with the m0 and m2
+                integration weights
+            t_min (np.float64): min period considered
+            t_max (np.float64): max period considered
+    '''
+
+    def __init__(
+            self,
+            center: float,
+            delta: float,
+            f: np.ndarray,
+            time_step: float = 1
+        ) -> None:
+        self.bins = window_filter_bins(f, center - delta, center + delta)
+        if self.bins.size == 0:
+            raise ValueError(
+                'No frequency inside the band [{}, {}].'.format(
+                    center - delta, center + delta
+                )
+            )
+        self.f = f[self.bins]
+
+        # Simpson's rule is linear: integrating the identity gives the
+        # weight of each sample
+        simpson = sci.integrate.simps(
+            np.eye(self.bins.size), dx=time_step, axis=-1
+        )
+        self.weights = np.stack([simpson, simpson * self.f**2], axis=-1)
+
+        self.t_max = 1/self.f[0]
+        self.t_min = 1/self.f[-1]
+
+    def moments(
+            self,
+            S: np.ndarray,
+            band_only: bool = False
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Calculates the zero and second order moments of one or many
+        spectra, stacked along the first axes.
+
+            Parameters:
+                S (np.ndarray): spectral density, with the frequency on
+                    the last axis
+                band_only (:obj:`bool`, optional): whether S only holds
+                    the bins of the band
+
+            Returns:
+                (tuple): tuple containing:
+
+                    m0 (np.ndarray): zero order momentum
+                    m2 (np.ndarray): second order momentum
+        '''
+        if not band_only:
+            S = S[..., self.bins]
+        moments = S @ self.weights
+
+        return moments[..., 0], moments[..., 1]
+
+    def natural_period(
+            self,
+            S: np.ndarray,
+            band_only: bool = False
+        ) -> np.ndarray:
+        '''
+        Calculates the natural period sqrt(m0/m2) of one or many spectra.
+        See `moments` for the parameters.
+        '''
+        m0, m2 = self.moments(S, band_only)
+
+        return np.sqrt(m0/m2)
 
 
 def calculate_centered_momentum(
@@ -58,7 +164,8 @@ def calculate_centered_momentum(
         delta: float,
         S: np.ndarray,
         f: np.ndarray,
-        time_step: float = 1
+        time_step: float = 1,
+        plan: MomentPlan = None,
     ) -> Tuple[float, float, float, float]:
 
     '''
@@ -77,6 +184,8 @@ def calculate_centered_momentum(
             S (np.ndarray): spectral density vector
             f (np.ndarray): frequency as an independente variable.
             time_step (:obj:`int`, optional): integration step
+            plan (:obj:`MomentPlan`, optional): precomputed plan for
+                the frequency vector f. A new plan is built if None.
 
     Returns:
             (tuple): tuple containing:
@@ -87,25 +196,12 @@ def calculate_centered_momentum(
                 t_max (np.float64): max period considered
     '''
 
-    # Filter the spectrum around the given center
-    low_limit = center - delta
-    high_limit = center + delta
-
-    f, S = window_filter(f,S,low_limit,high_limit)
-
-    #Zero order moment
-    m0 = sci.integrate.simps(S, dx=time_step)
-
-    #Second order moment
-    m2 = sci.integrate.simps(np.multiply(f**2,S), dx=time_step)
-
-    #Max. period considered
-    Tmax = 1/f[0]
+    if plan is None:
+        plan = MomentPlan(center, delta, f, time_step)
 
-    #Min period considered
-    Tmin = 1/f[-1]
+    m0, m2 = plan.moments(S)
 
-    return m0, m2, Tmin, Tmax
+    return m0, m2, plan.t_min, plan.t_max
 
 
 def welch_method(
@@ -117,7 +213,9 @@ def welch_method(
         window_division: int = 1,
         window_shift_rate: float = 0.01,
         segment_overlap_rate: float = 0.5,
-        sampling_frequency: float = 1.0
+        sampling_frequency: float = 1.0,
+        engine: str = 'loop',
+        batch_size: int = 64,
     ) -> Tuple[np.ndarray,
                np.ndarray,
                np.ndarray,
@@ -149,6 +247,17 @@ def welch_method(
                 overlap rate.
             sampling_frequency (float): wealch's method sampling
                 frequency.
+            engine (:obj:`str`, optional): spectral engine used to
+                evaluate the windows. 'loop' runs scipy's welch once
+                per window, 'batched' evaluates the windows in
+                vectorized batches, 'analytic' derives the spectrum
+                of the repeated window from the window itself and
+                'sliding' updates the band of that spectrum from one
+                window to the next and 'band' evaluates the welch
+                segments on the filtered band only (see `WELCH_ENGINES`).
+            batch_size (:obj:`int`, optional): number of windows
+                evaluated at once by the vectorized engines (anchor
+                interval of the 'sliding' engine).
 
 
     Returns:
@@ -164,7 +273,27 @@ def welch_method(
                 t_0 (np.float64): estimated natural period
     '''
 
+    if engine != 'loop':
+        if engine not in WELCH_ENGINES:
+            raise ValueError(
+                "Unknown welch engine '{}'. Available engines: {}".format(
+                    engine, ', '.join(['loop'] + sorted(WELCH_ENGINES))
+                )
+            )
+        return WELCH_ENGINES[engine](
+            timeserie = timeserie,
+            center = center,
+            delta = delta,
+            repetitions = repetitions,
+            window_size = window_size,
+            window_division = window_division,
+            window_shift_rate = window_shift_rate,
+            segment_overlap_rate = segment_overlap_rate,
+            sampling_frequency = sampling_frequency,
+            batch_size = batch_size,
+        )
 
+    plan = None
     measured_tp = np.array([])
     t = np.array([])
     window_shift = int(window_shift_rate * window_size)
@@ -192,7 +321,11 @@ def welch_method(
         t = np.append(t,time[index_to])
 
         #Calculate the moments
-        m0, m2, t_min, t_max = calculate_centered_momentum(center, delta, PSD, Of)
+        if plan is None:
+            plan = MomentPlan(center, delta, Of)
+        m0, m2, t_min, t_max = calculate_centered_momentum(
+            center, delta, PSD, Of, plan=plan
+        )
 
         t_0 = mt.sqrt(m0/m2)
         measured_tp = np.append(measured_tp, t_0)
@@ -200,6 +333,647 @@ def welch_method(
     return t, measured_tp, Of, PSD, t_max, t_min
 
 
+def sliding_windows(
+        timeserie: np.ndarray,
+        window_size: int,
+        window_shift: int,
+        window_total_number: int,
+    ) -> np.ndarray:
+    '''
+    Returns a read-only strided view with the sliding windows of a
+    time serie. No data is copied.
+
+        Parameters:
+            timeserie (np.ndarray): time serie to be windowed
+            window_size (int): size of each window
+            window_shift (int): shift between consecutive windows
+            window_total_number (int): number of windows
+
+        Returns:
+            windows (np.ndarray): view of shape
+                (window_total_number, window_size)
+    '''
+    timeserie = np.ascontiguousarray(timeserie, dtype=np.float64)
+    stride = timeserie.strides[0]
+
+    return np.lib.stride_tricks.as_strided(
+        timeserie,
+        shape=(window_total_number, window_size),
+        strides=(window_shift * stride, stride),
+        writeable=False,
+    )
+
+
+def _window_geometry(
+        timeserie: np.ndarray,
+        repetitions: int,
+        window_size: int,
+        window_division: int,
+        window_shift_rate: float,
+        segment_overlap_rate: float,
+    ) -> Tuple[int, int, int, int, int]:
+    '''
+    Reproduces the window and segment sizes used by `welch_method`,
+    including the integer casts applied by scipy's welch.
+    '''
+    window_shift = int(window_shift_rate * window_size)
+    window_total_number = int((timeserie.size - window_size) / (window_shift))
+    if window_total_number < 1:
+        raise ValueError(
+            'The time serie ({} points) is too short for a window of {} '
+            'points shifted by {} points.'.format(
+                timeserie.size, window_size, window_shift
+            )
+        )
+
+    segment_size = repetitions * window_size / window_division
+    nperseg = min(int(segment_size), repetitions * window_size)
+    noverlap = int(segment_overlap_rate * segment_size)
+
+    return window_shift, window_total_number, nperseg, noverlap, \
+        nperseg - noverlap
+
+
+def _welch_density_scale(
+        psd: np.ndarray,
+        bins: np.ndarray,
+        nfft: int,
+        window_power: float,
+        sampling_frequency: float,
+    ) -> np.ndarray:
+    '''
+    Applies scipy's one-sided density scaling in place to a squared
+    spectrum whose last axis holds the given frequency bins of an
+    `nfft` points FFT. `window_power` is the sum of the squared window.
+    '''
+    doubled = (bins > 0) & ((nfft % 2 == 1) | (bins < nfft // 2))
+    psd *= np.where(doubled, 2.0, 1.0) / (sampling_frequency * window_power)
+
+    return psd
+
+
+def batched_welch_method(
+        timeserie: np.ndarray,
+        center: float,
+        delta: float,
+        repetitions: int,
+        window_size: int,
+        window_division: int = 1,
+        window_shift_rate: float = 0.01,
+        segment_overlap_rate: float = 0.5,
+        sampling_frequency: float = 1.0,
+        batch_size: int = 64,
+    ) -> Tuple[np.ndarray,
+               np.ndarray,
+               np.ndarray,
+               np.ndarray,
+               np.float64,
+               np.float64]:
+    '''
+    Vectorized version of `welch_method`. The windows are taken as a
+    strided view of the time serie, the segment FFTs of a whole batch
+    of windows are computed in a single `rfft` call and the moments
+    are reduced for the whole batch at once.
+
+    Parameters and returns are the same as `welch_method`.
+    '''
+    window_shift, window_total_number, nperseg, noverlap, step = \
+        _window_geometry(
+            timeserie, repetitions, window_size, window_division,
+            window_shift_rate, segment_overlap_rate
+        )
+
+    windows = sliding_windows(
+        timeserie, window_size, window_shift, window_total_number
+    )
+    window = signal.get_window('hann', nperseg)
+    segment_total_number = (repetitions * window_size - noverlap) // step
+
+    Of = sp_fft.rfftfreq(nperseg, 1 / sampling_frequency)
+    bins = np.arange(Of.size)
+    plan = MomentPlan(center, delta, Of)
+
+    measured_tp = np.empty(window_total_number)
+    for start in range(0, window_total_number, batch_size):
+        stop = min(start + batch_size, window_total_number)
+
+        # Repeat the windows and split them into welch segments
+        repeated = np.tile(windows[start:stop], (1, repetitions))
+        segments = np.lib.stride_tricks.as_strided(
+            repeated,
+            shape=(stop - start, segment_total_number, nperseg),
+            strides=(
+                repeated.strides[0],
+                step * repeated.strides[1],
+                repeated.strides[1],
+            ),
+            writeable=False,
+        )
+
+        # Detrend, apply the window and average the segment spectra
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        spectrum = sp_fft.rfft(segments * window, axis=-1)
+        PSD = _welch_density_scale(
+            (spectrum.real ** 2 + spectrum.imag ** 2),
+            bins, nperseg, (window * window).sum(), sampling_frequency,
+        ).mean(axis=1)
+
+        # Calculate the moments of the whole batch
+        measured_tp[start:stop] = plan.natural_period(PSD)
+
+    t = (np.arange(window_total_number) * window_shift
+         + window_size).astype(np.float64)
+
+    return t, measured_tp, Of, PSD[-1], plan.t_max, plan.t_min
+
+
+def _tiled_source_terms(
+        bins: np.ndarray,
+        repetitions: int,
+        window_size: int,
+    ) -> List[Tuple[float, np.ndarray, np.ndarray, np.ndarray]]:
+    '''
+    Maps the bins of the Hann-windowed repeated signal FFT to the bins
+    of the single window FFT they depend on. Returns one
+    (weight, on_grid, source, mirrored) term per Hann neighbour, where
+    `source` holds the `rfft` bins of the window used by the `on_grid`
+    requested bins and `mirrored` flags the ones that must be conjugated.
+    '''
+    size = repetitions * window_size
+    terms = []
+    for offset, weight in ((-1, -0.25), (0, 0.5), (1, -0.25)):
+        neighbour = (bins + offset) % size
+        on_grid = neighbour % repetitions == 0
+        m = neighbour[on_grid] // repetitions
+
+        # Recover the negative frequencies from the hermitian symmetry
+        mirrored = m > window_size // 2
+        source = np.where(mirrored, window_size - m, m)
+        terms.append((weight, on_grid, source, mirrored))
+
+    return terms
+
+
+def tiled_source_bins(
+        bins: np.ndarray,
+        repetitions: int,
+        window_size: int,
+    ) -> np.ndarray:
+    '''
+    Returns the sorted `rfft` bins of a single window needed by
+    `tiled_hann_spectrum` to evaluate the given bins.
+    '''
+    return np.unique(np.concatenate([
+        source for _, _, source, _ in _tiled_source_terms(
+            bins, repetitions, window_size
+        )
+    ])).astype(np.int64)
+
+
+def tiled_hann_spectrum(
+        X: np.ndarray,
+        bins: np.ndarray,
+        repetitions: int,
+        window_size: int,
+        source_bins: np.ndarray = None,
+    ) -> np.ndarray:
+    '''
+    Returns selected bins of the FFT of a window repeated `repetitions`
+    times and multiplied by a Hann window of the repeated length,
+    computed from the FFT of the single window.
+
+    The repeated signal only has energy on the bins multiple of
+    `repetitions`, where its FFT is `repetitions` times the FFT of the
+    window. The Hann window mixes each bin with its two neighbours,
+    so every requested bin is a combination of at most three bins of
+    the single window spectrum and the repeated signal is never built.
+
+        Parameters:
+            X (np.ndarray): one-sided FFT (`rfft`) of the window. The
+                last axis must have `window_size // 2 + 1` bins, or
+                match `source_bins` when it is given.
+            bins (np.ndarray): bins of the repeated signal FFT to
+                evaluate, between 0 and `repetitions * window_size // 2`.
+            repetitions (int): number of repetitions of the window
+            window_size (int): size of the window
+            source_bins (:obj:`np.ndarray`, optional): sorted `rfft`
+                bins held by the last axis of X, as returned by
+                `tiled_source_bins`.
+
+        Returns:
+            Y (np.ndarray): complex spectrum on the requested bins
+    '''
+    Y = np.zeros(X.shape[:-1] + (bins.size,), dtype=np.complex128)
+
+    for weight, on_grid, source, mirrored in _tiled_source_terms(
+            bins, repetitions, window_size
+        ):
+        if source_bins is not None:
+            source = np.searchsorted(source_bins, source)
+        values = X[..., source]
+        values = np.where(mirrored, np.conj(values), values)
+
+        Y[..., on_grid] += weight * repetitions * values
+
+    return Y
+
+
+def analytic_welch_method(
+        timeserie: np.ndarray,
+        center: float,
+        delta: float,
+        repetitions: int,
+        window_size: int,
+        window_division: int = 1,
+        window_shift_rate: float = 0.01,
+        segment_overlap_rate: float = 0.5,
+        sampling_frequency: float = 1.0,
+        batch_size: int = 64,
+    ) -> Tuple[np.ndarray,
+               np.ndarray,
+               np.ndarray,
+               np.ndarray,
+               np.float64,
+               np.float64]:
+    '''
+    Version of `welch_method` that never repeats the windows. With a
+    single welch segment (`window_division=1`) the spectrum of the
+    repeated window is obtained in closed form from the spectrum of the
+    window itself (see `tiled_hann_spectrum`), so the FFT cost and the
+    memory used per window do not grow with `repetitions`.
+
+    Parameters and returns are the same as `welch_method`.
+    '''
+    if window_division != 1:
+        raise ValueError(
+            "The 'analytic' welch engine requires window_division=1, "
+            "got {}.".format(window_division)
+        )
+
+    window_shift, window_total_number, nperseg, _, _ = _window_geometry(
+        timeserie, repetitions, window_size, window_division,
+        window_shift_rate, segment_overlap_rate
+    )
+
+    windows = sliding_windows(
+        timeserie, window_size, window_shift, window_total_number
+    )
+    # Sum of the squared periodic Hann window of nperseg points
+    window_power = 0.375 * nperseg
+
+    Of = sp_fft.rfftfreq(nperseg, 1 / sampling_frequency)
+    plan = MomentPlan(center, delta, Of)
+    band_bins = plan.bins
+
+    measured_tp = np.empty(window_total_number)
+    for start in range(0, window_total_number, batch_size):
+        stop = min(start + batch_size, window_total_number)
+
+        # Detrend the windows and compute their spectra
+        batch = windows[start:stop]
+        X = sp_fft.rfft(batch - batch.mean(axis=-1, keepdims=True), axis=-1)
+
+        # Evaluate only the band of the repeated signal spectrum
+        Y = tiled_hann_spectrum(X, band_bins, repetitions, window_size)
+        S_band = _welch_density_scale(
+            Y.real ** 2 + Y.imag ** 2,
+            band_bins, nperseg, window_power, sampling_frequency,
+        )
+
+        # Calculate the moments of the whole batch
+        measured_tp[start:stop] = plan.natural_period(S_band, band_only=True)
+
+    # Full spectrum of the last window
+    bins = np.arange(Of.size)
+    Y = tiled_hann_spectrum(X[-1], bins, repetitions, window_size)
+    PSD = _welch_density_scale(
+        Y.real ** 2 + Y.imag ** 2,
+        bins, nperseg, window_power, sampling_frequency,
+    )
+
+    t = (np.arange(window_total_number) * window_shift
+         + window_size).astype(np.float64)
+
+    return t, measured_tp, Of, PSD, plan.t_max, plan.t_min
+
+
+def sliding_dft(
+        timeserie: np.ndarray,
+        window_size: int,
+        window_shift: int,
+        window_total_number: int,
+        dft_bins: np.ndarray,
+        anchor_interval: int = 64,
+    ) -> np.ndarray:
+    '''
+    Computes selected DFT bins of every sliding window of a time serie
+    with the sliding DFT recurrence
+
+        X_{j+1}[m] = e^{2 pi i m h / W} (X_j[m] + D_j[m])
+
+    where D_j holds the DFT bins of the `window_shift` samples entering
+    the window minus the ones leaving it. Each window costs
+    O(window_shift * bins) instead of a full FFT. The recurrence is
+    unrolled with a cumulative sum and restarted from a direct DFT every
+    `anchor_interval` windows to bound the accumulated rounding error.
+
+        Parameters:
+            timeserie (np.ndarray): time serie to be windowed
+            window_size (int): size W of each window
+            window_shift (int): shift h between consecutive windows
+            window_total_number (int): number of windows
+            dft_bins (np.ndarray): DFT bins m to evaluate
+            anchor_interval (:obj:`int`, optional): number of windows
+                between two direct DFT evaluations
+
+        Returns:
+            X (np.ndarray): complex array of shape
+                (window_total_number, dft_bins.size)
+    '''
+    timeserie = np.ascontiguousarray(timeserie, dtype=np.float64)
+    windows = sliding_windows(
+        timeserie, window_size, window_shift, window_total_number
+    )
+    # Samples entering each window when it advances
+    incoming = sliding_windows(
+        timeserie[window_size:], window_shift, window_shift,
+        window_total_number - 1
+    )
+
+    # Keep the phase arguments small by reducing them modulo W
+    kernel = np.exp(-2j * np.pi * (
+        np.outer(np.arange(window_size), dft_bins) % window_size
+    ) / window_size)
+
+    X = np.empty((window_total_number, dft_bins.size), dtype=np.complex128)
+    for start in range(0, window_total_number, anchor_interval):
+        stop = min(start + anchor_interval, window_total_number)
+        j = np.arange(stop - start)
+
+        # Block differences between the entering and leaving samples
+        D = (
+            incoming[start:stop - 1] - windows[start:stop - 1, :window_shift]
+        ) @ kernel[:window_shift]
+
+        # Unrolled recurrence: X_j = p^j (X_0 + sum_{l<j} p^{-l} D_l)
+        phase = 2 * np.pi * (
+            np.outer(j, dft_bins * window_shift) % window_size
+        ) / window_size
+        Z = np.empty((stop - start, dft_bins.size), dtype=np.complex128)
+        Z[0] = windows[start] @ kernel
+        np.cumsum(np.exp(-1j * phase[:-1]) * D, axis=0, out=Z[1:])
+        Z[1:] += Z[0]
+        X[start:stop] = np.exp(1j * phase) * Z
+
+    return X
+
+
+def sliding_welch_method(
+        timeserie: np.ndarray,
+        center: float,
+        delta: float,
+        repetitions: int,
+        window_size: int,
+        window_division: int = 1,
+        window_shift_rate: float = 0.01,
+        segment_overlap_rate: float = 0.5,
+        sampling_frequency: float = 1.0,
+        batch_size: int = 64,
+    ) -> Tuple[np.ndarray,
+               np.ndarray,
+               np.ndarray,
+               np.ndarray,
+               np.float64,
+               np.float64]:
+    '''
+    Version of `analytic_welch_method` where the window spectra are
+    updated incrementally with `sliding_dft`, evaluating only the
+    window bins needed by the band [center-delta, center+delta].
+    `batch_size` is used as the sliding DFT anchor interval.
+
+    Parameters and returns are the same as `welch_method`.
+    '''
+    if window_division != 1:
+        raise ValueError(
+            "The 'sliding' welch engine requires window_division=1, "
+            "got {}.".format(window_division)
+        )
+
+    window_shift, window_total_number, nperseg, _, _ = _window_geometry(
+        timeserie, repetitions, window_size, window_division,
+        window_shift_rate, segment_overlap_rate
+    )
+    # Sum of the squared periodic Hann window of nperseg points
+    window_power = 0.375 * nperseg
+
+    Of = sp_fft.rfftfreq(nperseg, 1 / sampling_frequency)
+    plan = MomentPlan(center, delta, Of)
+    band_bins = plan.bins
+
+    # Window bins needed by the band, updated window after window
+    source_bins = tiled_source_bins(band_bins, repetitions, window_size)
+    X = sliding_dft(
+        timeserie, window_size, window_shift, window_total_number,
+        source_bins, anchor_interval=batch_size,
+    )
+    # Detrending only removes the zero frequency bin
+    X[:, source_bins == 0] = 0
+
+    Y = tiled_hann_spectrum(
+        X, band_bins, repetitions, window_size, source_bins=source_bins
+    )
+    S_band = _welch_density_scale(
+        Y.real ** 2 + Y.imag ** 2,
+        band_bins, nperseg, window_power, sampling_frequency,
+    )
+
+    # Calculate the moments of all windows
+    measured_tp = plan.natural_period(S_band, band_only=True)
+
+    # Full spectrum of the last window
+    last_window = timeserie[
+        (window_total_number - 1) * window_shift:
+        (window_total_number - 1) * window_shift + window_size
+    ]
+    bins = np.arange(Of.size)
+    Y = tiled_hann_spectrum(
+        sp_fft.rfft(last_window - last_window.mean()),
+        bins, repetitions, window_size,
+    )
+    PSD = _welch_density_scale(
+        Y.real ** 2 + Y.imag ** 2,
+        bins, nperseg, window_power, sampling_frequency,
+    )
+
+    t = (np.arange(window_total_number) * window_shift
+         + window_size).astype(np.float64)
+
+    return t, measured_tp, Of, PSD, plan.t_max, plan.t_min
+
+
+def _segment_pieces(
+        window_size: int,
+        nperseg: int,
+        step: int,
+        segment_total_number: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Splits every welch segment of a repeated window into the pieces
+    lying in a single repetition. Returns, for each piece, its segment,
+    the start of its repetition in the repeated signal and its
+    [start, stop) samples in the window.
+    '''
+    pieces = []
+    for k in range(segment_total_number):
+        t0, t1 = k * step, k * step + nperseg
+        for p in range(t0 // window_size, (t1 - 1) // window_size + 1):
+            offset = p * window_size
+            pieces.append((
+                k,
+                offset,
+                max(t0, offset) - offset,
+                min(t1, offset + window_size) - offset,
+            ))
+
+    return tuple(np.array(column) for column in zip(*pieces))
+
+
+def band_welch_method(
+        timeserie: np.ndarray,
+        center: float,
+        delta: float,
+        repetitions: int,
+        window_size: int,
+        window_division: int = 1,
+        window_shift_rate: float = 0.01,
+        segment_overlap_rate: float = 0.5,
+        sampling_frequency: float = 1.0,
+        batch_size: int = 64,
+    ) -> Tuple[np.ndarray,
+               np.ndarray,
+               np.ndarray,
+               np.ndarray,
+               np.float64,
+               np.float64]:
+    '''
+    Version of `welch_method` that evaluates the welch segments only on
+    the frequency bins of the band [center-delta, center+delta], for
+    any `window_division`, without repeating the windows.
+
+    The Hann window mixes each bin m with its neighbours, so the band
+    only needs the rectangular DFT of the segments on the bins m-1, m
+    and m+1. A segment of a repeated window is made of a few pieces of
+    the window, and the DFT of any piece of the serie on a bin is a
+    difference of the cumulative sum of the modulated serie
+
+        C_m[v] = sum_{u<v} x[u] e^{-2 pi i m u / nperseg}
+
+    computed once per bin for the whole serie. Each segment of each
+    window then costs a few lookups per bin instead of an FFT, so the
+    serie is processed in O(samples * band bins) whatever the number of
+    windows, repetitions and segments. Detrending only removes the
+    zero frequency bin. `batch_size` is the number of windows whose
+    pieces are gathered at once.
+
+    Parameters and returns are the same as `welch_method`.
+    '''
+    window_shift, window_total_number, nperseg, noverlap, step = \
+        _window_geometry(
+            timeserie, repetitions, window_size, window_division,
+            window_shift_rate, segment_overlap_rate
+        )
+    window = signal.get_window('hann', nperseg)
+    segment_total_number = (repetitions * window_size - noverlap) // step
+
+    Of = sp_fft.rfftfreq(nperseg, 1 / sampling_frequency)
+    plan = MomentPlan(center, delta, Of)
+    band_bins = plan.bins
+
+    # Rectangular DFT bins needed by the Hann windowed band
+    dft_bins = np.arange(band_bins[0] - 1, band_bins[-1] + 2)
+
+    # Cumulative sums of the modulated serie, centered to keep them
+    # small (the constant is removed by the detrending anyway)
+    x = np.asarray(timeserie, dtype=np.float64)
+    x = x - x.mean()
+    samples = np.arange(x.size)
+    # Consecutive bins are modulated by successive twiddle products
+    # instead of a complex exponential per bin and sample
+    modulation = np.empty((dft_bins.size, x.size), dtype=np.complex128)
+    modulation[0] = x * np.exp(
+        -2j * np.pi * (dft_bins[0] * samples % nperseg) / nperseg
+    )
+    modulation[1:] = np.exp(-2j * np.pi * samples / nperseg)
+    np.cumprod(modulation, axis=0, out=modulation)
+    C = np.zeros((dft_bins.size, x.size + 1), dtype=np.complex128)
+    np.cumsum(modulation, axis=1, out=C[:, 1:])
+
+    # Phase of each piece in its segment, relative to the window start
+    segment, offset, u0, u1 = _segment_pieces(
+        window_size, nperseg, step, segment_total_number
+    )
+    piece_phase = np.exp(2j * np.pi * (
+        np.outer(dft_bins, segment * step - offset) % nperseg
+    ) / nperseg)
+    # Sums the pieces of each segment
+    segment_sum = np.zeros((segment.size, segment_total_number))
+    segment_sum[np.arange(segment.size), segment] = 1
+
+    hann_weights = np.array([-0.25, 0.5, -0.25])
+    measured_tp = np.empty(window_total_number)
+    for start in range(0, window_total_number, batch_size):
+        stop = min(start + batch_size, window_total_number)
+        window_start = np.arange(start, stop) * window_shift
+
+        # DFT of every piece of every window: (bins, windows, pieces)
+        X = (
+            C[:, window_start[:, None] + u1]
+            - C[:, window_start[:, None] + u0]
+        ) * piece_phase[:, None, :]
+        X = (X @ segment_sum) * np.exp(2j * np.pi * (
+            np.outer(dft_bins, window_start) % nperseg
+        ) / nperseg)[..., None]
+        X[dft_bins == 0] = 0
+
+        # Hann window: Y[m] = 0.5 X[m] - 0.25 (X[m-1] + X[m+1])
+        Y = sum(
+            weight * X[i:i + band_bins.size]
+            for i, weight in enumerate(hann_weights)
+        )
+        S_band = _welch_density_scale(
+            np.moveaxis(Y.real ** 2 + Y.imag ** 2, 0, -1),
+            band_bins, nperseg, (window * window).sum(), sampling_frequency,
+        ).mean(axis=1)
+
+        # Calculate the moments of the whole batch
+        measured_tp[start:stop] = plan.natural_period(S_band, band_only=True)
+
+    # Full spectrum of the last window
+    last_window = timeserie[
+        (window_total_number - 1) * window_shift:
+        (window_total_number - 1) * window_shift + window_size
+    ]
+    _, PSD = signal.welch(
+        x=np.tile(last_window, repetitions),
+        fs=sampling_frequency,
+        nperseg=nperseg,
+        noverlap=noverlap,
+    )
+
+    t = (np.arange(window_total_number) * window_shift
+         + window_size).astype(np.float64)
+
+    return t, measured_tp, Of, PSD, plan.t_max, plan.t_min
+
+
+WELCH_ENGINES = {
+    'batched': batched_welch_method,
+    'analytic': analytic_welch_method,
+    'sliding': sliding_welch_method,
+    'band': band_welch_method,
+}
+
+
 def return_plot_figure(
         x: np.ndarray,
         y: np.ndarray,
@@ -208,7 +982,7 @@ def return_plot_figure(
         title: str = 'title',
         x_range: List[float] = None,
         y_range: List[float] = None,
-    ) -> Figure:
+    ) -> 'Figure':
     '''
     Returns a plot figure given the x and y axis.
 
@@ -224,6 +998,7 @@ def return_plot_figure(
     Returns:
         figure (matplotlib.figure.Figure): matplotlib figure object
     '''
+    import matplotlib.pyplot as plt
 
     fig, ax = plt.subplots()
     ax.plot(x, y)
@@ -250,9 +1025,12 @@ def estimate_natural_period(
         delta: float,
         repetitions: int,
         window_size: int,
+        engine: str = 'loop',
+        lazy_figures: bool = False,
     ) -> Tuple[Union[
         np.float64,
-        Figure
+        'Figure',
+        Callable[[], 'Figure']
     ]]:
     '''
     Estimates the natural period of a given time serie using the Welch's Method.
@@ -267,6 +1045,11 @@ def estimate_natural_period(
             each window extracted from the time serie.
         window_size (int): size of the window extracted from
             the time serie
+        engine (:obj:`str`, optional): spectral engine used by
+            `welch_method`.
+        lazy_figures (:obj:`bool`, optional): if True, the figures are
+            returned as callables that draw them on demand, so
+            matplotlib is never touched unless they are called.
 
 
     Returns:
@@ -281,6 +1064,9 @@ def estimate_natural_period(
                     time serie.
                 tp_figure (matplotlib.figure.Figure): matplotlib figure object
                     with the plot of the natural periods obtained on each window.
+
+            With `lazy_figures`, psd_figure and tp_figure are callables
+            returning the figures.
     '''
 
     t, estimated_tp, Of, PSD, tp_max, tp_min = welch_method(
@@ -289,10 +1075,12 @@ def estimate_natural_period(
         delta = delta,
         repetitions = repetitions,
         window_size = window_size,
+        engine = engine,
     )
 
     tp_mean = estimated_tp.mean()
-    psd_figure = return_plot_figure(
+    psd_figure = partial(
+        return_plot_figure,
         x = Of,
         y = PSD,
         xlabel = 'Frequency [Hz]',
@@ -302,7 +1090,8 @@ def estimate_natural_period(
         ),
         x_range = [1/tp_max, 1/tp_min]
     )
-    tp_figure = return_plot_figure(
+    tp_figure = partial(
+        return_plot_figure,
         x = np.arange(estimated_tp.size),
         y = estimated_tp,
         xlabel = 'Window Number',
@@ -312,5 +1101,8 @@ def estimate_natural_period(
         ),
     )
 
+    if not lazy_figures:
+        psd_figure = psd_figure()
+        tp_figure = tp_figure()
 
     return tp_mean, tp_max, tp_min, psd_figure, tp_figure
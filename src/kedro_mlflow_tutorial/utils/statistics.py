@@ -0,0 +1,218 @@
+import numpy as np
+from typing import Dict, Sequence, Union
+
+
+# Statistics that need the third and fourth centered moments
+HIGHER_ORDER_STATISTICS = {'skew', 'kurtosis'}
+
+# Statistics computed by RunningMoments, besides the percentiles
+STATISTICS = ['mean', 'std', 'skew', 'kurtosis', 'min', 'max']
+
+# Samples per chunk: a chunk of a few channels stays in the CPU cache
+# while it is reduced, so the data is read from memory only once
+CHUNK_SIZE = 1 << 14
+
+
+class RunningMoments:
+    '''
+    Streaming statistics of the channels of a 2-D array, updated chunk
+    by chunk with the pairwise Welford/Pebay update of the centered
+    moments, so a partition never has to be held in memory at once.
+
+    Each chunk is reduced along its samples axis for all the channels
+    at once, and merged into the running moments in O(channels).
+
+        Parameters:
+            order (:obj:`int`, optional): highest centered moment kept,
+                2 for mean and std, 4 to also get skew and kurtosis.
+            extrema (:obj:`bool`, optional): whether to keep the min
+                and max of each channel.
+
+        Attributes:
+            count (int): number of samples seen
+            mean (np.ndarray): mean of each channel
+            m2, m3, m4 (np.ndarray): sums of the centered powers
+            min, max (np.ndarray): extrema of each channel
+    '''
+
+    def __init__(self, order: int = 2, extrema: bool = False) -> None:
+        if order not in (2, 4):
+            raise ValueError('order must be 2 or 4, got {}'.format(order))
+        self.order = order
+        self.extrema = extrema
+        self.count = 0
+        self.mean = self.m2 = self.m3 = self.m4 = None
+        self.min = self.max = None
+
+    def update(self,
+               chunk: np.ndarray,
+               overwrite: bool = False) -> 'RunningMoments':
+        '''
+        Adds a (channels, samples) chunk to the statistics. If overwrite,
+        the chunk is centered in place instead of copied.
+        '''
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if chunk.shape[1] == 0:
+            return self
+
+        other = RunningMoments(self.order, self.extrema)
+        other.count = chunk.shape[1]
+        other.mean = chunk.mean(axis=1)
+        if self.extrema:
+            other.min = chunk.min(axis=1)
+            other.max = chunk.max(axis=1)
+
+        centered = np.subtract(
+            chunk, other.mean[:, None], out=chunk if overwrite else None
+        )
+        other.m2 = np.einsum('ij,ij->i', centered, centered)
+        if self.order == 4:
+            squared = centered * centered
+            other.m3 = np.einsum('ij,ij->i', squared, centered)
+            other.m4 = np.einsum('ij,ij->i', squared, squared)
+
+        return self.merge(other)
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        '''
+        Merges the statistics of another set of samples of the same
+        channels into these ones.
+        '''
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            for name in ['count', 'mean', 'm2', 'm3', 'm4', 'min', 'max']:
+                setattr(self, name, getattr(other, name))
+            return self
+
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta_n = delta / n
+
+        mean = self.mean + delta_n * n_b
+        m2 = self.m2 + other.m2 + delta * delta_n * n_a * n_b
+        if self.order == 4:
+            m3 = (
+                self.m3 + other.m3
+                + delta * delta_n ** 2 * n_a * n_b * (n_a - n_b)
+                + 3 * delta_n * (n_a * other.m2 - n_b * self.m2)
+            )
+            self.m4 = (
+                self.m4 + other.m4
+                + delta * delta_n ** 3 * n_a * n_b
+                * (n_a * n_a - n_a * n_b + n_b * n_b)
+                + 6 * delta_n ** 2
+                * (n_a * n_a * other.m2 + n_b * n_b * self.m2)
+                + 4 * delta_n * (n_a * other.m3 - n_b * self.m3)
+            )
+            self.m3 = m3
+        if self.extrema:
+            self.min = np.minimum(self.min, other.min)
+            self.max = np.maximum(self.max, other.max)
+
+        self.count = n
+        self.mean = mean
+        self.m2 = m2
+
+        return self
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.m2 / self.count)
+
+    @property
+    def skew(self) -> np.ndarray:
+        self._check_order()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.sqrt(self.count) * self.m3 / self.m2 ** 1.5
+
+    @property
+    def kurtosis(self) -> np.ndarray:
+        '''
+        Excess (Fisher) kurtosis.
+        '''
+        self._check_order()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.count * self.m4 / (self.m2 * self.m2) - 3
+
+    def _check_order(self) -> None:
+        if self.order < 4:
+            raise ValueError('skew and kurtosis need order=4')
+
+    def statistics(self, names: Sequence[str]) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in names}
+
+
+def channel_statistics(
+        channels: Union[np.ndarray, Sequence[np.ndarray]],
+        statistics: Sequence[str] = ('mean', 'std'),
+        percentiles: Sequence[float] = (),
+        chunk_size: int = CHUNK_SIZE,
+    ) -> Dict[str, np.ndarray]:
+    '''
+    Computes statistics of every channel of a (channels, samples) array,
+    or of a sequence of same length 1-D channels, vectorized over the
+    channels.
+
+        Parameters:
+            channels (Union[np.ndarray, Sequence[np.ndarray]]): one row
+                or array per channel
+            statistics (:obj:`Sequence[str]`, optional): any of 'mean',
+                'std', 'skew', 'kurtosis' (excess), 'min' and 'max'.
+                std, skew and kurtosis are the biased (population)
+                estimators, like np.std and scipy.stats defaults.
+            percentiles (:obj:`Sequence[float]`, optional): percentiles
+                in [0, 100], returned as 'p<q>' (e.g. 'p95'). They need
+                all the samples at once, so they are not computed by
+                chunks.
+            chunk_size (:obj:`int`, optional): the moments are
+                accumulated over chunks of this many samples, so
+                memory-mapped channels are never loaded at once. None
+                reduces all the samples at once.
+
+        Returns:
+            statistics (Dict[str, np.ndarray]): one value per channel
+                for each statistic
+    '''
+    unknown = set(statistics) - set(STATISTICS)
+    if unknown:
+        raise ValueError('Unknown statistics: {}'.format(sorted(unknown)))
+
+    moments = RunningMoments(
+        order = 4 if HIGHER_ORDER_STATISTICS & set(statistics) else 2,
+        extrema = bool({'min', 'max'} & set(statistics)),
+    )
+    # Separate channels are stacked into a new chunk, centered in place
+    stacked = not (isinstance(channels, np.ndarray) and channels.ndim == 2)
+    n_samples = len(channels[0])
+    step = chunk_size or max(n_samples, 1)
+    for start in range(0, n_samples, step):
+        moments.update(
+            stack_channels(channels, start, start + step), overwrite=stacked
+        )
+
+    result = moments.statistics(statistics)
+
+    if len(percentiles):
+        for q, value in zip(percentiles, np.percentile(
+                stack_channels(channels), percentiles, axis=1
+            )):
+            result['p{:g}'.format(q)] = value
+
+    return result
+
+
+def stack_channels(
+        channels: Union[np.ndarray, Sequence[np.ndarray]],
+        start: int = None,
+        stop: int = None,
+    ) -> np.ndarray:
+    '''
+    Returns the [start, stop) samples of the channels as a contiguous
+    (channels, samples) array, copying only if they are separate arrays.
+    '''
+    if isinstance(channels, np.ndarray) and channels.ndim == 2:
+        return channels[:, start:stop]
+
+    return np.stack([channel[start:stop] for channel in channels])
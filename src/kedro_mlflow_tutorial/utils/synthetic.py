@@ -0,0 +1,232 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterator, Tuple
+from kedro_mlflow_tutorial.utils.tpn import (
+    SGS_METADATA,
+    SGS_TIME_SERIES_COLUMNS,
+)
+
+# Theoretical natural periods of surge and sway of the moored unit, in
+# seconds (see the estimator section of parameters.yml)
+TX_NATURAL_PERIOD = 259.06
+TY_NATURAL_PERIOD = 211.90
+
+# Seconds between two time steps of the simulated runs
+TIME_STEP = 1.0
+
+# Time constant (s) of the ramp the motions start with, mimicking the
+# transient the pipeline slices off (ignore_size)
+TRANSIENT = 100.0
+
+# Ranges the environment conditions are uniformly drawn from
+ENVIRONMENT_RANGES = {
+    'wave_hs': (1.0, 6.0),
+    'wave_tp': (6.0, 16.0),
+    'swell_hs': (0.5, 3.0),
+    'swell_tp': (10.0, 20.0),
+    'wind_speed': (2.0, 25.0),
+    'current_speed': (0.2, 1.5),
+}
+DIRECTIONS = ['wave_dir', 'swell_dir', 'win_dir', 'current_dir']
+
+# Intact mooring lines of the unit
+MOORING_LINES = 18
+
+
+def generate_environment(
+        rng: np.random.RandomState,
+        session_id: int = 0,
+    ) -> Dict[str, Any]:
+    '''
+    Draws the scalar metadata of a SGS run, keyed and typed like the
+    metadata returned by `TPNFileServer.h5ToSGSRun`.
+    '''
+    metadata = {
+        name: float(rng.uniform(low, high))
+        for name, (low, high) in ENVIRONMENT_RANGES.items()
+    }
+    metadata.update({
+        name: float(rng.uniform(0, 360)) for name in DIRECTIONS
+    })
+    metadata.update({
+        'lines': MOORING_LINES,
+        'rupture_time': 0.0,
+        'session_id': int(session_id),
+    })
+
+    return {name: metadata[name] for name in SGS_METADATA}
+
+
+def natural_periods(metadata: Dict[str, Any]) -> Tuple[float, float]:
+    '''
+    Natural periods (tp_x, tp_y) of a synthetic run. They grow slightly
+    with the wave height and current speed, which soften the mooring
+    around the mean offset, so the periods can be regressed from the
+    metadata like on the real runs.
+
+        Parameters:
+            metadata (Dict[str, Any]): metadata of the run
+
+        Returns:
+            periods (Tuple[float, float]): surge and sway natural
+                periods in seconds
+    '''
+    factor = (
+        1
+        + 0.04 * (metadata['wave_hs'] - 3.5) / 2.5
+        + 0.02 * (metadata['current_speed'] - 0.85) / 0.65
+    )
+
+    return TX_NATURAL_PERIOD * factor, TY_NATURAL_PERIOD * factor
+
+
+def narrowband_motion(
+        rng: np.random.RandomState,
+        t: np.ndarray,
+        period: float,
+        amplitude: float,
+        bandwidth: float = 0.02,
+        n_components: int = 32,
+    ) -> np.ndarray:
+    '''
+    Random motion with its energy concentrated around the given period,
+    as a sum of sinusoids with frequencies spread by a relative
+    bandwidth around 1 / period, random phases and Rayleigh amplitudes
+    scaled to the given significant amplitude.
+    '''
+    frequencies = (1 + bandwidth * rng.randn(n_components)) / period
+    phases = rng.uniform(0, 2 * np.pi, n_components)
+    amplitudes = rng.rayleigh(size=n_components)
+    amplitudes *= amplitude / np.sqrt(2 * np.sum(amplitudes ** 2))
+
+    motion = np.zeros(len(t))
+    for frequency, phase, component in zip(frequencies, phases, amplitudes):
+        motion += component * np.sin(2 * np.pi * frequency * t + phase)
+
+    return motion
+
+
+def generate_sgs_run(
+        n_steps: int,
+        seed: int = 0,
+        session_id: int = 0,
+        noise: float = 0.05,
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    '''
+    Generates a synthetic SGS run with the layout of
+    `TPNFileServer.h5ToSGSRun`: one column per SGS time series and a
+    dict of scalar metadata.
+
+    The surge and sway of the unit are slow drift oscillations at the
+    `natural_periods` of the run, around a mean offset pushed by the
+    environment, plus the wave and swell frequency motions. Heave, roll
+    and pitch follow the waves and the heading (zz, in degrees) slowly
+    oscillates around a mean. The local motions are rotated by the
+    heading into absolute X and Y, so `apply_rotation_matrix` recovers
+    them, and the speeds and accelerations are their time derivatives.
+
+        Parameters:
+            n_steps (int): time steps of the run, TIME_STEP seconds apart
+            seed (:obj:`int`, optional): seed of the environment and
+                the random phases, the same seed gives the same run
+            session_id (:obj:`int`, optional): session stored in the
+                metadata
+            noise (:obj:`float`, optional): standard deviation of the
+                white noise added to the positions, relative to their
+                oscillation amplitude
+
+        Returns:
+            (tuple): tuple containing:
+
+                data (pd.DataFrame): SGS_TIME_SERIES_COLUMNS series
+                metadata (Dict[str, Any]): SGS_METADATA scalars
+    '''
+    rng = np.random.RandomState(seed)
+    metadata = generate_environment(rng, session_id)
+    tp_x, tp_y = natural_periods(metadata)
+
+    t = np.arange(n_steps) * TIME_STEP
+    ramp = 1 - np.exp(-t / TRANSIENT)
+
+    hs = metadata['wave_hs']
+    swell_hs = metadata['swell_hs']
+
+    def wave_motion(scale: float) -> np.ndarray:
+        return (
+            narrowband_motion(rng, t, metadata['wave_tp'], scale * hs, 0.1)
+            + narrowband_motion(
+                rng, t, metadata['swell_tp'], scale * swell_hs, 0.05
+            )
+        )
+
+    def with_noise(motion: np.ndarray, amplitude: float) -> np.ndarray:
+        return motion + noise * amplitude * rng.randn(n_steps)
+
+    # Mean offsets grow with the drift forces
+    drift = 0.5 * hs ** 2 + 0.02 * metadata['wind_speed'] ** 2
+    drift += 3 * metadata['current_speed'] ** 2
+    surge_amplitude = 2 + hs
+    sway_amplitude = 1 + 0.6 * hs
+
+    surge = drift * np.cos(np.radians(metadata['wave_dir'])) + ramp * (
+        narrowband_motion(rng, t, tp_x, surge_amplitude) + wave_motion(0.3)
+    )
+    sway = drift * np.sin(np.radians(metadata['wave_dir'])) + ramp * (
+        narrowband_motion(rng, t, tp_y, sway_amplitude) + wave_motion(0.2)
+    )
+    surge = with_noise(surge, surge_amplitude)
+    sway = with_noise(sway, sway_amplitude)
+
+    heading = rng.uniform(0, 360)
+    positions = {
+        'z': with_noise(ramp * wave_motion(0.3), 0.3 * hs),
+        'xx': with_noise(ramp * wave_motion(0.6), 0.6 * hs),
+        'yy': with_noise(ramp * wave_motion(0.4), 0.4 * hs),
+        'zz': heading + ramp * narrowband_motion(rng, t, 400.0, 2.0, 0.1),
+    }
+
+    yaw = np.radians(positions['zz'])
+    cos_yaw, sin_yaw = np.cos(yaw), np.sin(yaw)
+    positions['x'] = surge * cos_yaw - sway * sin_yaw
+    positions['y'] = surge * sin_yaw + sway * cos_yaw
+
+    data = {}
+    for column in ['x', 'y', 'z', 'xx', 'yy', 'zz']:
+        data[column] = positions[column]
+        data['speed_' + column] = np.gradient(data[column], TIME_STEP)
+        data['accel_' + column] = np.gradient(
+            data['speed_' + column], TIME_STEP
+        )
+
+    return pd.DataFrame(data, columns=SGS_TIME_SERIES_COLUMNS), metadata
+
+
+def generate_sgs_runs(
+        n_runs: int,
+        n_steps: int,
+        seed: int = 0,
+        session_id: int = 0,
+    ) -> Iterator[Tuple[int, pd.DataFrame, Dict[str, Any]]]:
+    '''
+    Lazily generates n_runs synthetic SGS runs of n_steps time steps,
+    one at a time so that any number of them can be written to disk.
+
+        Parameters:
+            n_runs (int): number of environment conditions
+            n_steps (int): time steps of each run
+            seed (:obj:`int`, optional): base seed, each run is seeded
+                with seed + its environment condition
+            session_id (:obj:`int`, optional): session of the runs
+
+        Yields:
+            (tuple): tuple containing:
+
+                env_cond_id (int): environment condition, from 1
+                data (pd.DataFrame): time series of the run
+                metadata (Dict[str, Any]): metadata of the run
+    '''
+    for env_cond_id in range(1, n_runs + 1):
+        data, metadata = generate_sgs_run(
+            n_steps, seed=seed + env_cond_id, session_id=session_id
+        )
+        yield env_cond_id, data, metadata
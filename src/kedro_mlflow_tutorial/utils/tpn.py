@@ -1,10 +1,71 @@
 import os
+import io
 import h5py
+import numpy as np
+import queue
+import socket
 import tempfile
+import threading
+import time
 import pandas as pd
-from typing import Dict
+from typing import Any, Dict, IO, Iterator, List, Tuple, Union
 from pathlib import Path
+from collections import defaultdict
+from contextlib import contextmanager
 from smb.SMBConnection import SMBConnection
+from smb.base import NotConnectedError, SMBTimeout
+from kedro_mlflow_tutorial.utils.cache import FileCache
+
+# Errors after which a connection is dropped and the transfer retried
+CONNECTION_ERRORS = (NotConnectedError, SMBTimeout, socket.error)
+
+# Rows of the time_series_data dataset of a SGS file, in order
+SGS_TIME_SERIES_COLUMNS = [
+    'x', 'y', 'z', 'xx', 'yy', 'zz',
+    'speed_x', 'speed_y', 'speed_z', 'speed_xx', 'speed_yy', 'speed_zz',
+    'accel_x', 'accel_y', 'accel_z', 'accel_xx', 'accel_yy', 'accel_zz',
+]
+
+# Scalar datasets of a SGS file describing the simulated run
+SGS_METADATA = [
+    'current_dir', 'current_speed', 'lines', 'rupture_time', 'session_id',
+    'swell_dir', 'swell_hs', 'swell_tp', 'wave_dir', 'wave_hs', 'wave_tp',
+    'win_dir', 'wind_speed',
+]
+
+class TransferStats:
+    '''
+    Thread-safe timing and byte counters of a TPNFileServer, kept per
+    remote file and in total. Times are in seconds.
+    '''
+    def __init__(self) -> None:
+        self.files = defaultdict(lambda: defaultdict(float))
+        self.totals = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add(self, input_filepath: str = None, **counters: float) -> None:
+        '''
+        Adds the counters to the totals and, if given, to the record of
+        input_filepath.
+        '''
+        with self._lock:
+            for name, value in counters.items():
+                self.totals[name] += value
+                if input_filepath is not None:
+                    self.files[input_filepath][name] += value
+
+    @contextmanager
+    def timer(self, name: str, input_filepath: str = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(input_filepath, **{name: time.perf_counter() - start})
+
+    def file(self, input_filepath: str) -> Dict[str, float]:
+        with self._lock:
+            return dict(self.files.get(input_filepath, {}))
+
 
 class TPNFileServer:
     def __init__(self,
@@ -14,6 +75,14 @@ class TPNFileServer:
         domain_name: str,
         shared_folder: str,
         base_path: str,
+        pool_size: int = 1,
+        max_retries: int = 1,
+        cache: FileCache = None,
+        spill_threshold: int = None,
+        columns: List[str] = None,
+        metadata: List[str] = None,
+        samples: Tuple[int, int] = None,
+        range_block_size: int = None,
         ) -> None:
         self.username = username
         self.password = password
@@ -24,7 +93,182 @@ class TPNFileServer:
         self.base_path = base_path
         self.connection = None
 
+        # Bounded pool of authenticated connections: idle connections are
+        # kept in the queue and at most pool_size are open at any time
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self._idle_connections = queue.LifoQueue()
+        self._open_connections = threading.BoundedSemaphore(pool_size)
+
+        # Optional local cache of the downloaded files
+        self.cache = cache
+
+        # Size in bytes above which an uncached download is spilled from
+        # memory to a temporary file before decoding. None keeps it in memory
+        self.spill_threshold = spill_threshold
+
+        # Time series columns and metadata datasets read from the SGS
+        # files, None reads all of them
+        self.columns = columns
+        self.metadata = metadata
+
+        # (start, stop) window of time steps read from time_series_data,
+        # None reads the whole series. It is not a substitute for the
+        # ignore_size steps apply_rotation_matrix drops afterwards, both
+        # cuts apply
+        self.samples = samples
+
+        # If set, uncached files are read in place by byte ranges of this
+        # size instead of being transferred whole (see SMBRangeFile)
+        self.range_block_size = range_block_size
+
+        # Connection, transfer and decoding counters
+        self.stats = TransferStats()
+
+    def __enter__(self) -> 'TPNFileServer':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.closeConnections()
+
+    @contextmanager
+    def pooledConnection(self) -> Iterator[SMBConnection]:
+        '''
+        Lends a connection from the pool, opening one if none is idle.
+        The connection goes back to the pool when the block ends, or is
+        closed if the block raised, so the next caller reconnects.
+        '''
+        self._open_connections.acquire()
+        connection = None
+        try:
+            connection = self._takeIdleConnection() or self.getConnection()
+            yield connection
+        except BaseException:
+            self._closeConnection(connection)
+            self._open_connections.release()
+            raise
+        else:
+            self._idle_connections.put(connection)
+            self._open_connections.release()
+
+    def _takeIdleConnection(self) -> SMBConnection:
+        # Health check the idle connections, dropping the dead ones
+        while True:
+            try:
+                connection = self._idle_connections.get_nowait()
+            except queue.Empty:
+                return None
+            try:
+                connection.echo(b'ping', timeout=5)
+                return connection
+            except CONNECTION_ERRORS:
+                self._closeConnection(connection)
+
+    @staticmethod
+    def _closeConnection(connection: SMBConnection) -> None:
+        if connection is not None:
+            try:
+                connection.close()
+            except CONNECTION_ERRORS:
+                pass
+
+    def closeConnections(self) -> None:
+        while True:
+            try:
+                self._closeConnection(self._idle_connections.get_nowait())
+            except queue.Empty:
+                return
+
+    def retrieveFile(self, input_filepath: str, out_file: IO) -> int:
+        '''
+        Retrieves a file of the shared folder into out_file with a pooled
+        connection, reconnecting and retrying on connection errors.
+        Returns the number of bytes transferred.
+        '''
+        for attempt in range(self.max_retries + 1):
+            out_file.seek(0)
+            out_file.truncate()
+            try:
+                with self.pooledConnection() as connection, \
+                        self.stats.timer('transfer_time', input_filepath):
+                    _, size = connection.retrieveFile(
+                        self.shared_folder,
+                        input_filepath,
+                        out_file
+                    )
+                self.stats.add(input_filepath, bytes = size)
+                return size
+            except CONNECTION_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+
+    def retrieveFileRange(self,
+                          input_filepath: str,
+                          offset: int,
+                          length: int) -> bytes:
+        '''
+        Retrieves length bytes of a file of the shared folder starting at
+        offset, with the same pooling and retries as retrieveFile.
+        '''
+        for attempt in range(self.max_retries + 1):
+            out_file = io.BytesIO()
+            try:
+                with self.pooledConnection() as connection, \
+                        self.stats.timer('transfer_time', input_filepath):
+                    connection.retrieveFileFromOffset(
+                        self.shared_folder,
+                        input_filepath,
+                        out_file,
+                        offset = offset,
+                        max_length = length,
+                    )
+                self.stats.add(
+                    input_filepath, bytes = out_file.tell(), requests = 1
+                )
+                return out_file.getvalue()
+            except CONNECTION_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+
+    def getFileAttributes(self, input_filepath: str):
+        with self.pooledConnection() as connection:
+            return connection.getAttributes(self.shared_folder, input_filepath)
+
+    def retrieveCachedFile(self, input_filepath: str) -> Path:
+        '''
+        Returns the local cache path of a file of the shared folder,
+        downloading it only if its size or modification time changed.
+        '''
+        with self.cachedFile(input_filepath) as path:
+            return path
+
+    @contextmanager
+    def cachedFile(self, input_filepath: str) -> Iterator[Path]:
+        '''
+        Like `retrieveCachedFile`, but the file cannot be evicted by the
+        other downloads until the context exits.
+        '''
+        attributes = self.getFileAttributes(input_filepath)
+        key = self.cache.key(
+            input_filepath,
+            attributes.file_size,
+            attributes.last_write_time,
+        )
+
+        with self.cache.pinned(
+                key,
+                lambda out_file: self.retrieveFile(input_filepath, out_file),
+                ) as path:
+            yield path
+
     def getConnection(self):
+        with self.stats.timer('connect_time'):
+            connection = self._connect()
+        self.stats.add(connections = 1)
+
+        return connection
+
+    def _connect(self) -> SMBConnection:
         connection = SMBConnection(
                         self.username,
                         self.password,
@@ -39,15 +283,20 @@ class TPNFileServer:
 
         return connection
 
+    def sgsFilePath(self,
+                    session_id: int,
+                    env_cond_id: int,
+                    filetype: str = 'pos') -> str:
+        return self.base_path + '/{}/{}/{}.h5'.format(
+            session_id,
+            str(env_cond_id).zfill(4),
+            filetype
+        )
+
     def downloadFile(self, input_filepath: str, output_filepath: str, ) -> str:
 
-        with self.getConnection() as connection:
-            with open(output_filepath, 'wb') as out_file:
-                connection.retrieveFile(
-                    self.shared_folder,
-                    input_filepath,
-                    out_file
-                )
+        with open(output_filepath, 'wb') as out_file:
+            self.retrieveFile(input_filepath, out_file)
 
         return output_filepath
 
@@ -60,14 +309,7 @@ class TPNFileServer:
                         file_only: bool = True,
                        ) -> str:
 
-        self.session_id = session_id
-        self.env_cond_id = env_cond_id
-
-        input_filepath = self.base_path + '/{}/{}/{}.h5'.format(
-            session_id,
-            str(env_condition_id).zfill(4),
-            filetype
-        )
+        input_filepath = self.sgsFilePath(session_id, env_cond_id, filetype)
 
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         if file_only:
@@ -89,17 +331,28 @@ class TPNFileServer:
                         output_dir: str,
                         filetype: str = 'pos',
                         file_only: bool = True,
-                       ) -> str:
-
-        self.session_id = session_id
-        self.env_cond_id = env_cond_id
+                       ) -> Tuple[pd.DataFrame, str]:
 
-        input_filepath = self.base_path + '/{}/{}/{}.h5'.format(
-            session_id,
-            str(env_cond_id).zfill(4),
-            filetype
+        df, _, filename = self.downloadSGSRun(
+            session_id, env_cond_id, output_dir, filetype, file_only
         )
 
+        return df, filename
+
+
+    def downloadSGSRun(self,
+                       session_id: int,
+                       env_cond_id: int,
+                       output_dir: str,
+                       filetype: str = 'pos',
+                       file_only: bool = True,
+                      ) -> Tuple[pd.DataFrame, Dict[str, Any], str]:
+        '''
+        Like `downloadSGSDataAsDataFrame`, but also returns the scalar
+        metadata of the run (see `h5ToSGSRun`).
+        '''
+        input_filepath = self.sgsFilePath(session_id, env_cond_id, filetype)
+
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         if file_only:
             filename = '{}_{}_{}.csv'.format(
@@ -111,73 +364,224 @@ class TPNFileServer:
             filename = os.path.basename(input_filepath)
         output_filepath = os.path.join(output_dir, filename)
 
-        df = self.retrieveSGSData(session_id, env_cond_id)
+        df, metadata = self.retrieveSGSRun(session_id, env_cond_id, filetype)
         # df.to_csv(output_filepath)
 
-        return df, filename
+        return df, metadata, filename
 
 
     def retrieveSGSData(self,
                         session_id: int,
                         env_cond_id: int,
                         filetype: str = 'pos'
-                       ) -> str:
+                       ) -> pd.DataFrame:
+
+        return self.retrieveSGSRun(session_id, env_cond_id, filetype)[0]
 
-        input_filepath = self.base_path + '/{}/{}/{}.h5'.format(
-            session_id,
-            str(env_cond_id).zfill(4),
-            filetype
-        )
 
-        return self.retrieveDataFrameFromH5(input_filepath)
+    def retrieveSGSRun(self,
+                       session_id: int,
+                       env_cond_id: int,
+                       filetype: str = 'pos'
+                      ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        '''
+        Like `retrieveSGSData`, but also returns the scalar metadata of
+        the run (see `h5ToSGSRun`).
+        '''
+        input_filepath = self.sgsFilePath(session_id, env_cond_id, filetype)
+
+        return self.retrieveSGSRunFromH5(input_filepath)
 
 
     def retrieveDataFrameFromH5(self, input_filepath: str) -> pd.DataFrame:
 
-        with tempfile.NamedTemporaryFile() as out_file:
-            with self.getConnection() as connection:
-                connection.retrieveFile(
-                    self.shared_folder,
+        return self.retrieveSGSRunFromH5(input_filepath)[0]
+
+
+    def retrieveSGSRunFromH5(self, input_filepath: str
+                            ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        '''
+        Decodes a HDF5 file of the shared folder. Without a cache the file
+        is buffered in memory and decoded from there, it is only written
+        to a temporary file once larger than spill_threshold.
+        '''
+        with self.stats.timer('total_time', input_filepath):
+            if self.cache is not None:
+                # Pinned until decoded, a concurrent download could
+                # otherwise evict it before it is opened
+                with self.cachedFile(input_filepath) as path:
+                    return self.h5ToSGSRun(str(path), input_filepath)
+
+            if self.range_block_size:
+                # Only the byte ranges h5py asks for cross the network,
+                # so their transfer time is part of the decode time
+                return self.h5ToSGSRun(SMBRangeFile(
+                    self,
                     input_filepath,
-                    out_file
-                )
+                    self.getFileAttributes(input_filepath).file_size,
+                    self.range_block_size,
+                ), input_filepath)
+
+            # max_size=0 never rolls over to disk
+            with tempfile.SpooledTemporaryFile(
+                    max_size=self.spill_threshold or 0) as out_file:
+                self.retrieveFile(input_filepath, out_file)
                 out_file.seek(0)
 
-                data = self.h5ToDataFrame(
-                    os.path.join(tempfile.gettempdir(),out_file.name)
-                )
+                data = self.h5ToSGSRun(out_file, input_filepath)
 
         return data
 
 
-    def h5ToDataFrame(self,filepath: str) -> Dict:
-        data = {}
-        with h5py.File(filepath, 'r') as h5:
-            datasets = list(h5.keys())
-            for dataset in datasets:
-                data[dataset] = h5[dataset][()]
+    def h5ToDataFrame(self,
+                      h5_file: Union[str, IO],
+                      input_filepath: str = None,
+                     ) -> pd.DataFrame:
+        '''
+        Builds the SGS dataframe of a HDF5 file, without its metadata
+        (see `h5ToSGSRun`).
+        '''
+        return self.h5ToSGSRun(h5_file, input_filepath)[0]
+
+
+    def h5ToSGSRun(self,
+                   h5_file: Union[str, IO],
+                   input_filepath: str = None,
+                  ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        '''
+        Builds the SGS dataframe of a HDF5 file, given either its path or
+        a readable binary file object. Only the rows of time_series_data
+        matching self.columns, restricted to the self.samples window of
+        time steps, and the self.metadata datasets are read.
+        The scalar metadata of the run is returned once, as a dict of
+        plain Python values, instead of being repeated on every row.
+        Decoding times are recorded under input_filepath, if given.
+        '''
+        columns = self.columns or SGS_TIME_SERIES_COLUMNS
+        metadata = SGS_METADATA if self.metadata is None else self.metadata
+
+        unknown = (
+            set(columns) - set(SGS_TIME_SERIES_COLUMNS)
+        ) | (set(metadata) - set(SGS_METADATA))
+        if unknown:
+            raise ValueError(
+                'Unknown SGS columns: {}'.format(sorted(unknown))
+            )
 
-        column_names = [
-            'x', 'y', 'z', 'xx', 'yy', 'zz',
-            'speed_x', 'speed_y', 'speed_z', 'speed_xx', 'speed_yy', 'speed_zz',
-            'accel_x', 'accel_y', 'accel_z', 'accel_xx', 'accel_yy', 'accel_zz',
-        ]
+        # h5py selections need increasing indices
+        rows = sorted(SGS_TIME_SERIES_COLUMNS.index(c) for c in columns)
+        samples = slice(*self.samples) if self.samples else slice(None)
+        with self.stats.timer('decode_time', input_filepath), \
+                h5py.File(h5_file, 'r') as h5:
+            time_series = h5['time_series_data'][rows, samples]
+            data = {name: h5[name][()] for name in metadata}
+
+        with self.stats.timer('frame_time', input_filepath):
+            df = pd.DataFrame.from_dict(dict(zip(
+                [SGS_TIME_SERIES_COLUMNS[row] for row in rows], time_series
+            )))[columns]
+
+        return df, {name: to_python_value(data[name]) for name in metadata}
+
+
+class SMBRangeFile(io.RawIOBase):
+    '''
+    Read-only file object over a file of the shared folder, which fetches
+    the bytes it is asked for on demand, in blocks of block_size bytes.
+    Handed to h5py, only the superblock, object headers and the selected
+    parts of the datasets are transferred.
+    '''
+    def __init__(self,
+                 tpn_client: TPNFileServer,
+                 input_filepath: str,
+                 size: int,
+                 block_size: int = 1 << 20,
+                 ) -> None:
+        super().__init__()
+        self.tpn_client = tpn_client
+        self.input_filepath = input_filepath
+        self.size = size
+        self.block_size = block_size
+        self.position = 0
+        self.bytes_transferred = 0
+        self._blocks = {}
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError('Invalid whence: {}'.format(whence))
+
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        end = min(self.position + len(buffer), self.size)
+        if end <= self.position:
+            return 0
 
-        df = pd.DataFrame.from_dict(
-            dict(zip(column_names, data['time_series_data']))
+        first_block = self.position // self.block_size
+        last_block = (end - 1) // self.block_size
+        self._fetchBlocks(first_block, last_block)
+
+        data = b''.join(
+            self._blocks[block] for block in range(first_block, last_block + 1)
         )
-        df['current_dir'] = data['current_dir']
-        df['current_speed'] = data['current_speed']
-        df['lines'] = data['lines']
-        df['rupture_time'] = data['rupture_time']
-        df['session_id'] = data['session_id']
-        df['swell_dir'] = data['swell_dir']
-        df['swell_hs'] = data['swell_hs']
-        df['swell_tp'] = data['swell_tp']
-        df['wave_dir'] = data['wave_dir']
-        df['wave_hs'] = data['wave_hs']
-        df['wave_tp'] = data['wave_tp']
-        df['win_dir'] = data['win_dir']
-        df['wind_speed'] = data['wind_speed']
-
-        return df
+        start = self.position - first_block * self.block_size
+        length = end - self.position
+        memoryview(buffer)[:length] = data[start:start + length]
+        self.position = end
+
+        return length
+
+    def _fetchBlocks(self, first_block: int, last_block: int) -> None:
+        '''
+        Fetches the missing blocks of [first_block, last_block], one
+        ranged request per run of consecutive missing blocks.
+        '''
+        missing = [
+            block for block in range(first_block, last_block + 1)
+            if block not in self._blocks
+        ]
+        while missing:
+            run_end = 0
+            while (run_end + 1 < len(missing)
+                   and missing[run_end + 1] == missing[run_end] + 1):
+                run_end += 1
+
+            offset = missing[0] * self.block_size
+            data = self.tpn_client.retrieveFileRange(
+                self.input_filepath,
+                offset,
+                min((run_end + 1) * self.block_size, self.size - offset),
+            )
+            self.bytes_transferred += len(data)
+            for i, block in enumerate(missing[:run_end + 1]):
+                self._blocks[block] = data[
+                    i * self.block_size:(i + 1) * self.block_size
+                ]
+            missing = missing[run_end + 1:]
+
+
+def to_python_value(value: Any) -> Any:
+    '''
+    Converts a value read from a HDF5 dataset to a JSON serializable
+    Python value.
+    '''
+    value = np.asarray(value).tolist()
+    if isinstance(value, bytes):
+        return value.decode()
+
+    return value
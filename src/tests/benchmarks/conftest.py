@@ -0,0 +1,21 @@
+"""Synthetic data shared by the benchmarks.
+
+Benchmarks are skipped by the default test run (see ``setup.cfg``), run
+them with ``kedro test src/tests/benchmarks --benchmark-only``.
+"""
+import pytest
+
+from .synthetic import sinusoid_with_noise
+
+
+@pytest.fixture(scope="session")
+def synthetic_series():
+    """Returns a cached ``sinusoid_with_noise`` of the given length."""
+    cache = {}
+
+    def make(length: int):
+        if length not in cache:
+            cache[length] = sinusoid_with_noise(length)
+        return cache[length]
+
+    return make
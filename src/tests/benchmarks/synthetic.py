@@ -0,0 +1,39 @@
+"""Synthetic series with a known natural period for the benchmarks."""
+import numpy as np
+
+# Natural period of the synthetic series, inside the band searched by
+# the estimator around EXPECTED_TP
+TRUE_TP = 230.0
+EXPECTED_TP = 235.0
+DELTA = 0.002
+
+WINDOW_SIZES = [1800, 3600, 7200]
+REPETITIONS = [1, 3, 5]
+SERIES_LENGTHS = [20000, 60000]
+
+# Relative error on the period the estimator must stay within
+PERIOD_TOLERANCE = 0.03
+
+
+def sinusoid_with_noise(
+        length: int,
+        period: float = TRUE_TP,
+        noise: float = 0.3,
+        seed: int = 0,
+    ) -> np.ndarray:
+    """Sinusoid of a known period with a random phase plus white noise."""
+    rng = np.random.RandomState(seed)
+    t = np.arange(length)
+    phase = rng.uniform(0, 2 * np.pi)
+
+    return np.sin(2 * np.pi * t / period + phase) + noise * rng.randn(length)
+
+
+def record_period_accuracy(benchmark, estimated_tp: float) -> float:
+    """Stores the estimated period and its relative error in the report."""
+    error = abs(estimated_tp - TRUE_TP) / TRUE_TP
+    benchmark.extra_info["true_tp"] = TRUE_TP
+    benchmark.extra_info["estimated_tp"] = float(estimated_tp)
+    benchmark.extra_info["relative_error"] = float(error)
+
+    return error
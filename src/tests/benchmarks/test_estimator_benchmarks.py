@@ -0,0 +1,123 @@
+"""Runtime and accuracy benchmarks of the natural period estimator.
+
+Every estimator benchmark runs on a sinusoid plus noise of known period
+and records the estimated period and its relative error in the report
+(``extra_info``), failing if the error exceeds ``PERIOD_TOLERANCE``.
+"""
+import numpy as np
+import pytest
+
+from kedro_mlflow_tutorial.pipelines.data_engineering.nodes import (
+    apply_rotation_matrix,
+)
+from kedro_mlflow_tutorial.utils.estimator import (
+    MomentPlan,
+    calculate_centered_momentum,
+    estimate_natural_period,
+    welch_method,
+)
+
+from .synthetic import (
+    DELTA,
+    EXPECTED_TP,
+    PERIOD_TOLERANCE,
+    REPETITIONS,
+    SERIES_LENGTHS,
+    WINDOW_SIZES,
+    record_period_accuracy,
+)
+
+ENGINES = ["loop", "batched", "analytic", "sliding", "band"]
+
+# Heavy cases are timed over a fixed number of rounds
+ROUNDS = 3
+
+
+def skip_unsupported_loop(engine, length, window_size, repetitions):
+    # The loop engine reads the time of the last window from the repeated
+    # window itself, so it only supports series shorter than that
+    window_shift = int(0.01 * window_size)
+    last_index = (length - window_size) // window_shift * window_shift
+    if engine == "loop" and last_index + window_size >= repetitions * window_size:
+        pytest.skip("loop engine needs length < repetitions * window_size")
+
+
+@pytest.mark.parametrize("length", SERIES_LENGTHS)
+@pytest.mark.parametrize("repetitions", REPETITIONS)
+@pytest.mark.parametrize("window_size", WINDOW_SIZES)
+@pytest.mark.parametrize("engine", ENGINES)
+def test_welch_method(
+        benchmark, synthetic_series, engine, window_size, repetitions, length):
+    skip_unsupported_loop(engine, length, window_size, repetitions)
+    benchmark.group = "welch_method-w{}-r{}-n{}".format(
+        window_size, repetitions, length
+    )
+    timeserie = synthetic_series(length)
+
+    _, measured_tp, *_ = benchmark.pedantic(
+        welch_method,
+        args=(timeserie, 1 / EXPECTED_TP, DELTA, repetitions, window_size),
+        kwargs={"engine": engine},
+        rounds=ROUNDS,
+    )
+
+    assert record_period_accuracy(
+        benchmark, measured_tp.mean()
+    ) < PERIOD_TOLERANCE
+
+
+@pytest.mark.parametrize("engine", ["batched", "analytic", "sliding"])
+def test_estimate_natural_period(benchmark, synthetic_series, engine):
+    benchmark.group = "estimate_natural_period"
+
+    tp_mean, *_ = benchmark.pedantic(
+        estimate_natural_period,
+        args=(synthetic_series(60000), EXPECTED_TP, DELTA, 3, 7200),
+        kwargs={"engine": engine, "lazy_figures": True},
+        rounds=ROUNDS,
+    )
+
+    assert record_period_accuracy(benchmark, tp_mean) < PERIOD_TOLERANCE
+
+
+@pytest.mark.parametrize("planned", [False, True])
+def test_calculate_centered_momentum(benchmark, synthetic_series, planned):
+    benchmark.group = "calculate_centered_momentum"
+    _, _, f, psd, *_ = welch_method(
+        synthetic_series(20000), 1 / EXPECTED_TP, DELTA, 3, 7200,
+        engine="analytic",
+    )
+    plan = MomentPlan(1 / EXPECTED_TP, DELTA, f) if planned else None
+
+    m0, m2, _, _ = benchmark(
+        calculate_centered_momentum, 1 / EXPECTED_TP, DELTA, psd, f, plan=plan
+    )
+
+    assert record_period_accuracy(benchmark, np.sqrt(m0 / m2)) < (
+        PERIOD_TOLERANCE
+    )
+
+
+@pytest.mark.parametrize("length", [100000, 1000000])
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+@pytest.mark.parametrize("mode", ["yaw", "full"])
+def test_apply_rotation_matrix(benchmark, mode, dtype, length):
+    benchmark.group = "apply_rotation_matrix-n{}".format(length)
+    rng = np.random.RandomState(0)
+    positions = list(rng.randn(3, length) * 10)
+    angles = list(rng.uniform(-30, 30, (3, length)))
+
+    rotated = benchmark(
+        apply_rotation_matrix, *positions, *angles,
+        as_frame=False, dtype=dtype, mode=mode,
+    )
+
+    expected = apply_rotation_matrix(
+        *positions, *angles, as_frame=False, mode=mode
+    )
+    error = max(
+        float(np.max(np.abs(rotated[column] - expected[column])))
+        for column in expected
+    )
+    benchmark.extra_info["max_abs_error"] = error
+    assert error < (1e-3 if dtype == "float32" else 1e-12)
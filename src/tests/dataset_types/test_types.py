@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kedro_mlflow_tutorial.dataset_types import (
+    ColumnarDataSet,
+    NpyPartitionedDataSet,
+    convert_csv_partitions,
+)
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({
+        'x': np.linspace(0, 1, 10),
+        'y': np.linspace(1, 2, 10),
+        'session_id': np.full(10, 22),
+    })
+
+
+class TestColumnarDataSet:
+    @pytest.mark.parametrize("file_format", ["parquet", "feather"])
+    def test_save_and_load(self, tmp_path, data, file_format):
+        data_set = ColumnarDataSet(
+            str(tmp_path / "data"), file_format=file_format
+        )
+        data_set.save(data)
+
+        pd.testing.assert_frame_equal(data_set.load(), data)
+
+    def test_columns_and_float_dtype(self, tmp_path, data):
+        filepath = str(tmp_path / "data.parquet")
+        ColumnarDataSet(filepath).save(data)
+
+        loaded = ColumnarDataSet(
+            filepath, columns=['x', 'session_id'], float_dtype='float32'
+        ).load()
+
+        assert list(loaded.columns) == ['x', 'session_id']
+        assert loaded['x'].dtype == np.float32
+        assert loaded['session_id'].dtype == data['session_id'].dtype
+
+
+class TestNpyPartitionedDataSet:
+    def test_save_and_load(self, tmp_path, data):
+        data_set = NpyPartitionedDataSet(str(tmp_path), float_dtype='float32')
+        data_set.save({
+            'b': lambda: data,
+            'a': {'x': data['x'].values},
+        })
+
+        partitions = data_set.load()
+
+        assert list(partitions) == ['a', 'b']
+        b = partitions['b']()
+        assert isinstance(b['x'], np.memmap)
+        assert b['x'].dtype == np.float32
+        np.testing.assert_array_equal(b['session_id'], data['session_id'])
+        np.testing.assert_array_equal(
+            partitions['a']()['x'], data['x'].astype(np.float32)
+        )
+
+
+def test_convert_csv_partitions(tmp_path, data):
+    data.to_csv(tmp_path / "22_0001_pos.csv", index=False)
+
+    converted = convert_csv_partitions(str(tmp_path), remove_source=True)
+
+    assert converted == [tmp_path / "22_0001_pos.parquet"]
+    assert not (tmp_path / "22_0001_pos.csv").exists()
+    pd.testing.assert_frame_equal(
+        ColumnarDataSet(str(converted[0])).load(), data
+    )
+
+
+def test_convert_csv_partitions_splits_metadata(tmp_path, data):
+    source_dir = tmp_path / "sgs"
+    metadata_dir = tmp_path / "sgs_metadata"
+    source_dir.mkdir()
+    data.to_csv(source_dir / "22_0001_pos.csv", index=False)
+    data.assign(session_id=23).to_csv(
+        source_dir / "23_0001_pos.csv", index=False
+    )
+    # Converted before the metadata was split out
+    ColumnarDataSet(str(source_dir / "23_0001_pos.parquet")).save(
+        data.assign(session_id=23)
+    )
+    (source_dir / "23_0001_pos.csv").unlink()
+
+    converted = convert_csv_partitions(
+        str(source_dir), metadata_dir=str(metadata_dir)
+    )
+
+    assert converted == [source_dir / "22_0001_pos.parquet"]
+    pd.testing.assert_frame_equal(
+        ColumnarDataSet(str(converted[0])).load(), data[['x', 'y']]
+    )
+    for partition_id, session_id in [("22_0001_pos", 22), ("23_0001_pos", 23)]:
+        record = json.loads(
+            (metadata_dir / "{}.json".format(partition_id)).read_text()
+        )
+        assert record == {"session_id": session_id}
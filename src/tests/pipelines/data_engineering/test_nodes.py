@@ -0,0 +1,269 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.spatial.transform import Rotation
+
+from kedro_mlflow_tutorial.pipelines.data_engineering import nodes
+from kedro_mlflow_tutorial.pipelines.data_engineering.nodes import (
+    apply_rotation_matrix,
+    calculate_position_statistics,
+    generate_feature_data,
+    generate_raw_feature_data,
+    transform_coordinates,
+)
+
+
+def load_raw_partition(seed, size=1000):
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        column: rng.randn(size)
+        for column in ['x', 'y', 'z', 'xx', 'yy', 'zz']
+    })
+
+
+def load_partition(seed):
+    rng = np.random.RandomState(seed)
+    t = np.arange(5000)
+    return pd.DataFrame({
+        column: np.sin(2 * np.pi * t / (230 + seed)) + 0.2 * rng.randn(t.size)
+        for column in ['x', 'y', 'z', 'roll', 'pitch', 'yaw']
+    })
+
+
+@pytest.fixture
+def partitioned_input():
+    return {
+        'partition_{}'.format(i): partial(load_partition, i)
+        for i in [3, 0, 2, 1]
+    }
+
+
+class TestTransformCoordinates:
+    def test_lazy_matches_eager(self):
+        partitioned_input = {
+            'partition_{}'.format(i): partial(load_raw_partition, i)
+            for i in range(3)
+        }
+
+        expected = transform_coordinates(partitioned_input)
+        result = transform_coordinates(partitioned_input, lazy=True)
+
+        assert list(result) == list(expected)
+        for partition_key, partition_load_func in result.items():
+            assert callable(partition_load_func)
+            pd.testing.assert_frame_equal(
+                partition_load_func(), expected[partition_key]
+            )
+
+
+def reference_rotation(X, Y, Z, XX, YY, ZZ, ignore_size=500):
+    yaw = ZZ * np.pi / 180
+    return {
+        'x': (X * np.cos(yaw) + Y * np.sin(yaw))[ignore_size:],
+        'y': (-X * np.sin(yaw) + Y * np.cos(yaw))[ignore_size:],
+        'z': Z[ignore_size:],
+        'roll': (XX * np.pi / 180)[ignore_size:],
+        'pitch': (YY * np.pi / 180)[ignore_size:],
+        'yaw': yaw[ignore_size:],
+    }
+
+
+class TestApplyRotationMatrix:
+    @pytest.fixture
+    def columns(self):
+        partition = load_raw_partition(0, size=2000) * 90
+        return [
+            partition[c].values for c in ['x', 'y', 'z', 'xx', 'yy', 'zz']
+        ]
+
+    def test_matches_reference(self, columns):
+        result = apply_rotation_matrix(*columns)
+
+        pd.testing.assert_frame_equal(
+            result, pd.DataFrame(reference_rotation(*columns))
+        )
+
+    def test_float32_into_out_buffers(self, columns):
+        out = {
+            column: np.empty(1500, np.float32)
+            for column in ['x', 'y', 'z', 'roll', 'pitch', 'yaw']
+        }
+
+        result = apply_rotation_matrix(
+            *columns, as_frame=False, dtype='float32', out=out
+        )
+
+        for column, expected in reference_rotation(*columns).items():
+            assert result[column] is out[column]
+            np.testing.assert_allclose(
+                result[column], expected, rtol=1e-4, atol=1e-3
+            )
+
+    def test_stacked_partitions(self, columns):
+        partitions = [
+            [
+                load_raw_partition(seed)[c].values
+                for c in ['x', 'y', 'z', 'xx', 'yy', 'zz']
+            ]
+            for seed in range(3)
+        ]
+
+        result = apply_rotation_matrix(
+            *[np.stack(channel) for channel in zip(*partitions)],
+            ignore_size=100,
+        )
+
+        for i, partition in enumerate(partitions):
+            for column, expected in reference_rotation(
+                    *partition, ignore_size=100).items():
+                np.testing.assert_allclose(result[column][i], expected)
+
+    def test_full_mode_matches_euler_rotation(self, columns):
+        X, Y, Z, XX, YY, ZZ = columns
+        XX, YY = XX / 3, YY / 3
+
+        result = apply_rotation_matrix(
+            X, Y, Z, XX, YY, ZZ, ignore_size=0, mode='full'
+        )
+
+        matrices = Rotation.from_euler(
+            'ZYX', np.stack([ZZ, YY, XX], axis=1), degrees=True
+        ).as_matrix()
+        expected = np.einsum(
+            'nji,nj->ni', matrices, np.stack([X, Y, Z], axis=1)
+        )
+        np.testing.assert_allclose(
+            result[['x', 'y', 'z']].values, expected, atol=1e-10
+        )
+
+    def test_full_mode_without_roll_and_pitch_is_yaw(self, columns):
+        X, Y, Z, XX, YY, ZZ = columns
+        flat = [X, Y, Z, np.zeros_like(XX), np.zeros_like(YY), ZZ]
+
+        pd.testing.assert_frame_equal(
+            apply_rotation_matrix(*flat, mode='full'),
+            apply_rotation_matrix(*flat, mode='yaw'),
+        )
+
+    def test_unknown_mode_raises(self, columns):
+        with pytest.raises(ValueError, match='roll_only'):
+            apply_rotation_matrix(*columns, mode='roll_only')
+
+
+class TestGenerateFeatureData:
+    def test_parallel_matches_sequential(self, partitioned_input):
+        args = (235.0, 'tp_x', 0.002, 3, 2000, 'analytic')
+
+        expected = generate_feature_data(partitioned_input, *args)
+        result = generate_feature_data(partitioned_input, *args, n_workers=2)
+
+        pd.testing.assert_frame_equal(result, expected)
+        assert list(result['partition_key']) == sorted(partitioned_input)
+
+    @pytest.mark.parametrize('n_workers', [0, -1])
+    def test_no_workers_runs_serially(self, partitioned_input, mocker,
+                                      n_workers):
+        args = (235.0, 'tp_x', 0.002, 3, 2000, 'analytic')
+        executor = mocker.spy(nodes, 'ProcessPoolExecutor')
+
+        result = generate_feature_data(
+            partitioned_input, *args, n_workers=n_workers
+        )
+
+        pd.testing.assert_frame_equal(
+            result, generate_feature_data(partitioned_input, *args)
+        )
+        executor.assert_not_called()
+
+    def test_workers_run_a_single_threaded_blas(self, mocker):
+        limits = mocker.patch.object(nodes, 'threadpool_limits')
+        mocker.patch.dict(nodes.os.environ)
+
+        nodes.single_threaded_worker()
+
+        limits.assert_called_once_with(limits=1)
+        for variable in nodes.THREAD_COUNT_VARIABLES:
+            assert nodes.os.environ[variable] == '1'
+
+    def test_array_partitions(self):
+        partitioned_input = {
+            'partition_0': lambda: dict(load_raw_partition(0).items())
+        }
+
+        expected = transform_coordinates(
+            {'partition_0': partial(load_raw_partition, 0)}
+        )
+        result = transform_coordinates(partitioned_input)
+
+        assert isinstance(result['partition_0'], dict)
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(result['partition_0']), expected['partition_0']
+        )
+
+    def test_fused_matches_two_steps(self):
+        partitioned_input = {
+            'partition_{}'.format(i): partial(load_raw_partition, i, 3000)
+            for i in range(2)
+        }
+        args = (235.0, 'tp_x', 0.002, 3, 1000, 'analytic')
+
+        expected = generate_feature_data(
+            transform_coordinates(partitioned_input), *args
+        )
+        result = generate_raw_feature_data(partitioned_input, *args)
+
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_metadata_is_joined(self, partitioned_input):
+        args = (235.0, 'tp_x', 0.002, 3, 2000, 'analytic')
+        partitioned_metadata = {
+            'partition_{}'.format(i): partial(
+                dict, wave_hs=i / 10, session_id=22
+            )
+            for i in [1, 0, 3]
+        }
+
+        result = generate_feature_data(
+            partitioned_input, *args,
+            partitioned_metadata=partitioned_metadata,
+            metadata_columns=['wave_hs'],
+        )
+
+        assert 'session_id' not in result
+        np.testing.assert_array_equal(
+            result['wave_hs'], [0.0, 0.1, np.nan, 0.3]
+        )
+
+
+class TestCalculatePositionStatistics:
+    def test_offset_and_std(self):
+        data = load_partition(0)
+
+        result = calculate_position_statistics(data)
+
+        assert len(result) == 12
+        for column in ['x', 'y', 'z', 'roll', 'pitch', 'yaw']:
+            assert result['off_' + column] == pytest.approx(
+                np.mean(data[column].values), abs=1e-12
+            )
+            assert result['std_' + column] == pytest.approx(
+                np.std(data[column].values)
+            )
+
+    def test_chunked_extra_statistics(self):
+        data = {
+            column: values.values
+            for column, values in load_partition(1).items()
+        }
+
+        expected = calculate_position_statistics(
+            data, ['skew', 'kurtosis', 'max'], [95], chunk_size=None
+        )
+        result = calculate_position_statistics(
+            data, ['skew', 'kurtosis', 'max'], [95], chunk_size=700
+        )
+
+        assert {'kurt_roll', 'max_z', 'p95_yaw'} <= set(result)
+        assert result == pytest.approx(expected)
@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from kedro_mlflow_tutorial.pipelines.data_integration.nodes import (
+    download_sgs_data,
+    download_summary,
+)
+from kedro_mlflow_tutorial.utils.tpn import TPNFileServer
+
+
+@pytest.fixture
+def credentials():
+    return {'tpn': {'username': 'user', 'password': 'pass'}}
+
+
+@pytest.fixture
+def tpn_params():
+    return {
+        'server_ip': '10.0.0.1',
+        'domain_name': 'domain',
+        'shared_folder': 'share',
+    }
+
+
+def sgs_params(parallelism, incremental=False):
+    return {
+        'base_path': '/sgs',
+        'download': {
+            'dir': 'data/01_raw/sgs',
+            'mode': 'sparse',
+            'file_only': True,
+            'session_ids': [22],
+            'parallelism': parallelism,
+            'incremental': incremental,
+            'env_cond': {'start_id': 1, 'end_id': 9, 'step': 1, 'ids': None},
+        },
+    }
+
+
+def fake_retrieve_sgs_run(self, session_id, env_cond_id, filetype='pos'):
+    if env_cond_id == 4:
+        raise OSError('connection reset')
+    return (
+        pd.DataFrame({'x': [float(env_cond_id)]}),
+        {'session_id': session_id, 'wave_hs': env_cond_id / 10},
+    )
+
+
+class TestDownloadSGSData:
+    @pytest.mark.parametrize("parallelism", [1, 4])
+    def test_failed_files_are_skipped(
+            self, mocker, tmp_path, credentials, tpn_params, parallelism):
+        mocker.patch.object(
+            TPNFileServer, 'retrieveSGSRun', fake_retrieve_sgs_run
+        )
+
+        data, metadata, metrics = download_sgs_data(
+            credentials, sgs_params(parallelism), tpn_params, str(tmp_path)
+        )
+
+        expected_ids = [i for i in range(1, 9) if i != 4]
+        assert sorted(data) == [
+            '22_{}_pos'.format(str(i).zfill(4)) for i in expected_ids
+        ]
+        for i in expected_ids:
+            partition_id = '22_{}_pos'.format(str(i).zfill(4))
+            assert data[partition_id]['x'][0] == i
+            assert metadata[partition_id]['wave_hs'] == i / 10
+
+        assert metrics['download_files']['value'] == 7
+        assert metrics['download_failed_files']['value'] == 1
+        assert [m['step'] for m in metrics['download_file_time']] == list(
+            range(1, 8)
+        )
+
+    def test_incremental_only_fetches_missing_partitions(
+            self, mocker, tmp_path, credentials, tpn_params):
+        retrieve = mocker.patch.object(
+            TPNFileServer, 'retrieveSGSRun', autospec=True,
+            side_effect=fake_retrieve_sgs_run,
+        )
+        data, _, _ = download_sgs_data(
+            credentials, sgs_params(1, incremental=True), tpn_params,
+            str(tmp_path), existing_partitions=['22_0001_pos', '22_0002_pos'],
+        )
+
+        fetched = sorted(call[0][2] for call in retrieve.call_args_list)
+        assert fetched == [3, 4, 5, 6, 7, 8]
+        assert sorted(data) == [
+            '22_{}_pos'.format(str(i).zfill(4)) for i in [3, 5, 6, 7, 8]
+        ]
+
+
+class TestDownloadSummary:
+    def test_total_row_uses_wall_time(self):
+        summary = download_summary({
+            'a': {'bytes': 4e6, 'transfer_time': 1.0, 'total_time': 2.0},
+            'b': {'bytes': 2e6, 'transfer_time': 0.5, 'total_time': 1.0},
+        }, wall_time=2.0)
+
+        assert list(summary.index) == ['a', 'b', 'total']
+        assert summary.loc['total', 'bytes'] == 6e6
+        assert summary.loc['total', 'transfer_time'] == 1.5
+        assert summary.loc['total', 'decode_time'] == 0.0
+        assert list(summary['throughput_mbps']) == [2.0, 2.0, 3.0]
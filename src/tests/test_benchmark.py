@@ -0,0 +1,164 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from kedro_mlflow_tutorial import benchmark
+from kedro_mlflow_tutorial.benchmark import (
+    benchmark_pipelines,
+    cleared_paths,
+    scaling_summary,
+    write_synthetic_data,
+)
+from kedro_mlflow_tutorial.utils.tpn import (
+    SGS_METADATA,
+    SGS_TIME_SERIES_COLUMNS,
+)
+
+
+def pipeline_result(partitions, pipeline="de"):
+    return {
+        "partitions": partitions,
+        "pipeline": pipeline,
+        "wall_time": 2 + 0.5 * partitions,
+        "run_time": 0.5 * partitions,
+        "peak_rss_mb": 200 + 0.1 * partitions,
+        "peak_children_rss_mb": 0.0,
+        "nodes": {"transform_coordinates": 0.2 * partitions},
+    }
+
+
+class TestScalingSummary:
+    def test_linear_fit(self):
+        results = [
+            {"partitions": 10, "pipeline": "generate", "wall_time": 1.0},
+            pipeline_result(10),
+            pipeline_result(20),
+            pipeline_result(40, "ds"),
+            pipeline_result(80, "ds"),
+        ]
+
+        summary = scaling_summary(results, project_to=10000)
+
+        assert list(summary.columns) == [
+            10, 20, 40, 80, "per_partition", "projected_10000"
+        ]
+        assert list(summary.index.get_level_values("pipeline").unique()) == [
+            "generate", "de", "ds"
+        ]
+        assert summary.loc[("de", "wall_time"), "per_partition"] == (
+            pytest.approx(0.5)
+        )
+        assert summary.loc[("de", "wall_time"), "projected_10000"] == (
+            pytest.approx(5002)
+        )
+        assert summary.loc[("ds", "peak_rss_mb"), "projected_10000"] == (
+            pytest.approx(1200)
+        )
+        assert summary.loc[
+            ("ds", "node:transform_coordinates"), "projected_10000"
+        ] == pytest.approx(2000)
+
+    def test_single_count_is_proportional(self):
+        summary = scaling_summary([pipeline_result(10)], project_to=100)
+
+        assert summary.loc[("de", "wall_time"), "projected_100"] == (
+            pytest.approx(70)
+        )
+        assert np.isnan(summary.loc[("de", "peak_rss_mb"), "projected_100"])
+
+
+@pytest.mark.parametrize("env", ["base", "local"])
+def test_benchmark_refuses_protected_envs(tmp_path, env):
+    with pytest.raises(ValueError, match="delete the SGS partitions"):
+        benchmark_pipelines(tmp_path, [10], 100, env=env)
+
+
+class FakeCatalog:
+    def __init__(self):
+        self.saved = {}
+
+    def save(self, name, partitions):
+        self.saved.setdefault(name, {}).update(partitions)
+
+
+CLEARED_DATASETS = ["sgs_dataset", "sgs_metadata", "transformed_sgs_dataset"]
+
+BASE_CATALOG = {name: {"path": "data/" + name} for name in CLEARED_DATASETS}
+
+
+def benchmark_context(tmp_path, columns=None, metadata=None, conf_catalog=None):
+    if conf_catalog is None:
+        conf_catalog = {
+            name: {"path": "data/benchmark/" + name} for name in CLEARED_DATASETS
+        }
+    return SimpleNamespace(
+        project_path=tmp_path,
+        CONF_ROOT="conf",
+        config_loader=SimpleNamespace(get=lambda *patterns: conf_catalog),
+        params={"sgs": {"download": {"columns": columns, "metadata": metadata}}},
+        catalog=FakeCatalog(),
+    )
+
+
+@pytest.fixture(autouse=True)
+def base_catalog(mocker):
+    mocker.patch.object(
+        benchmark, "base_catalog_config", return_value=BASE_CATALOG
+    )
+
+
+class TestClearedPaths:
+    def test_benchmark_root(self, tmp_path):
+        paths = cleared_paths(benchmark_context(tmp_path))
+
+        assert paths == [
+            tmp_path.resolve() / "data" / "benchmark" / name
+            for name in CLEARED_DATASETS
+        ]
+
+    def test_env_without_overrides_is_refused(self, tmp_path):
+        context = benchmark_context(tmp_path, conf_catalog=BASE_CATALOG)
+        (tmp_path / "data" / "sgs_dataset").mkdir(parents=True)
+
+        with pytest.raises(ValueError, match="the one of the base catalog"):
+            write_synthetic_data(context, 1, 100)
+
+        assert (tmp_path / "data" / "sgs_dataset").exists()
+        assert not context.catalog.saved
+
+    def test_path_outside_the_benchmark_root_is_refused(self, tmp_path):
+        conf_catalog = {
+            name: {"path": "data/staging/" + name} for name in CLEARED_DATASETS
+        }
+        context = benchmark_context(tmp_path, conf_catalog=conf_catalog)
+
+        with pytest.raises(ValueError, match="not under"):
+            cleared_paths(context)
+
+
+def test_synthetic_data_has_the_downloaded_layout(tmp_path):
+    context = benchmark_context(tmp_path, ["x", "y", "zz"], ["wave_hs", "lines"])
+    stale = tmp_path / "data" / "benchmark" / "sgs_dataset" / "stale"
+    stale.mkdir(parents=True)
+
+    write_synthetic_data(context, 2, 100, session_id=22)
+
+    saved = context.catalog.saved
+    assert list(saved["sgs_dataset"]) == ["22_0001_pos", "22_0002_pos"]
+    assert list(saved["sgs_metadata"]) == ["22_0001_pos", "22_0002_pos"]
+    for partition_id, data in saved["sgs_dataset"].items():
+        assert list(data.columns) == ["x", "y", "zz"]
+        assert list(saved["sgs_metadata"][partition_id]) == ["wave_hs", "lines"]
+    assert not stale.parent.exists()
+
+
+def test_null_download_parameters_keep_everything(tmp_path):
+    context = benchmark_context(tmp_path, None, None)
+
+    write_synthetic_data(context, 1, 100)
+
+    (data,) = context.catalog.saved["sgs_dataset"].values()
+    (metadata,) = context.catalog.saved["sgs_metadata"].values()
+    assert list(data.columns) == SGS_TIME_SERIES_COLUMNS
+    assert list(metadata) == SGS_METADATA
@@ -0,0 +1,36 @@
+from kedro_mlflow_tutorial.hooks import saved_partition_ids
+
+
+class FakeCatalog:
+    """Catalog of partitioned datasets, given as lists of partition ids."""
+
+    def __init__(self, **data_sets):
+        self.data_sets = data_sets
+
+    def exists(self, name):
+        return bool(self.data_sets[name])
+
+    def load(self, name):
+        return {partition_id: None for partition_id in self.data_sets[name]}
+
+
+def test_saved_partition_ids():
+    catalog = FakeCatalog(
+        sgs_dataset=["22_0002_pos", "22_0001_pos"], empty=[]
+    )
+
+    assert saved_partition_ids(catalog, "sgs_dataset") == [
+        "22_0001_pos", "22_0002_pos"
+    ]
+    assert saved_partition_ids(catalog, "empty") == []
+
+
+def test_partitions_must_be_saved_in_every_data_set():
+    catalog = FakeCatalog(
+        sgs_dataset=["22_0001_pos", "22_0002_pos"],
+        sgs_metadata=["22_0002_pos", "22_0003_pos"],
+    )
+
+    assert saved_partition_ids(catalog, "sgs_dataset", "sgs_metadata") == [
+        "22_0002_pos"
+    ]
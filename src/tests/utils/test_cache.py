@@ -0,0 +1,81 @@
+import os
+
+from kedro_mlflow_tutorial.utils.cache import FileCache
+
+
+def writer(content):
+    return lambda out_file: out_file.write(content)
+
+
+class TestFileCache:
+    def test_key_depends_on_version(self):
+        key = FileCache.key('/sgs/22/0001/pos.h5', 10, 1.0)
+
+        assert key == FileCache.key('/sgs/22/0001/pos.h5', 10, 1.0)
+        assert key != FileCache.key('/sgs/22/0001/pos.h5', 10, 2.0)
+        assert key != FileCache.key('/sgs/22/0001/pos.h5', 11, 1.0)
+
+    def test_fetch_only_writes_on_miss(self, tmp_path):
+        cache = FileCache(str(tmp_path))
+        calls = []
+
+        def write(out_file):
+            calls.append(1)
+            out_file.write(b'data')
+
+        first = cache.fetch('key', write)
+        second = cache.fetch('key', write)
+
+        assert first == second
+        assert first.read_bytes() == b'data'
+        assert len(calls) == 1
+
+    def test_least_recently_used_are_evicted(self, tmp_path):
+        cache = FileCache(str(tmp_path), max_bytes=25)
+        cache.fetch('a', writer(b'a' * 10))
+        cache.fetch('b', writer(b'b' * 10))
+        os.utime(str(cache.path('a')), (0, 0))
+        os.utime(str(cache.path('b')), (1, 1))
+        cache.get('a')
+
+        cache.fetch('c', writer(b'c' * 10))
+
+        assert cache.get('a') is not None
+        assert cache.get('b') is None
+        assert cache.get('c') is not None
+        assert cache.size() == 20
+
+    def test_index_is_loaded_from_the_directory(self, tmp_path):
+        cache = FileCache(str(tmp_path), max_bytes=25)
+        cache.fetch('a', writer(b'a' * 10))
+        cache.fetch('b', writer(b'b' * 10))
+        os.utime(str(cache.path('a')), (1, 1))
+        os.utime(str(cache.path('b')), (0, 0))
+
+        reopened = FileCache(str(tmp_path), max_bytes=25)
+        reopened.fetch('c', writer(b'c' * 10))
+
+        assert reopened.size() == 20
+        assert reopened.get('a') is not None
+        assert reopened.get('b') is None
+
+    def test_pinned_files_are_not_evicted(self, tmp_path):
+        cache = FileCache(str(tmp_path), max_bytes=15)
+
+        with cache.pinned('a', writer(b'a' * 10)) as path:
+            cache.fetch('b', writer(b'b' * 10))
+
+            assert path.read_bytes() == b'a' * 10
+
+        cache.fetch('c', writer(b'c' * 10))
+
+        assert cache.get('a') is None
+        assert cache.get('b') is None
+        assert cache.get('c') is not None
+
+    def test_removed_files_are_misses(self, tmp_path):
+        cache = FileCache(str(tmp_path))
+        cache.fetch('a', writer(b'a' * 10)).unlink()
+
+        assert cache.get('a') is None
+        assert cache.size() == 0
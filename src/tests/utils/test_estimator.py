@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+import scipy.integrate
+
+from kedro_mlflow_tutorial.utils.estimator import (
+    MomentPlan,
+    calculate_centered_momentum,
+    estimate_natural_period,
+    welch_method,
+    window_filter,
+)
+
+
+@pytest.fixture
+def time_serie():
+    rng = np.random.RandomState(42)
+    t = np.arange(6000)
+    return np.sin(2 * np.pi * t / 235) + 0.3 * rng.randn(t.size)
+
+
+def assert_same_welch_output(expected, result):
+    assert len(expected) == len(result)
+    for expected_value, value in zip(expected, result):
+        atol = 1e-12 * np.max(np.abs(expected_value))
+        np.testing.assert_allclose(value, expected_value, rtol=1e-9, atol=atol)
+
+
+class TestWelchEngines:
+    @pytest.mark.parametrize("window_division", [1, 3])
+    def test_batched_matches_loop(self, time_serie, window_division):
+        kwargs = dict(
+            timeserie=time_serie,
+            center=1 / 235,
+            delta=0.002,
+            repetitions=3,
+            window_size=2000,
+            window_division=window_division,
+        )
+
+        expected = welch_method(**kwargs)
+        result = welch_method(engine="batched", batch_size=7, **kwargs)
+
+        assert_same_welch_output(expected, result)
+
+    @pytest.mark.parametrize("window_division", [1, 2, 3, 7])
+    def test_band_matches_loop(self, time_serie, window_division):
+        kwargs = dict(
+            timeserie=time_serie,
+            center=1 / 235,
+            delta=0.002,
+            repetitions=3,
+            window_size=2000,
+            window_division=window_division,
+        )
+
+        expected = welch_method(**kwargs)
+        result = welch_method(engine="band", batch_size=7, **kwargs)
+
+        assert_same_welch_output(expected, result)
+
+    @pytest.mark.parametrize("repetitions", [1, 2, 3])
+    def test_analytic_matches_loop(self, time_serie, repetitions):
+        kwargs = dict(
+            timeserie=time_serie,
+            center=1 / 235,
+            delta=0.002,
+            repetitions=repetitions,
+            window_size=1999,
+            window_shift_rate=0.1,
+        )
+
+        expected = welch_method(engine="batched", **kwargs)
+        result = welch_method(engine="analytic", **kwargs)
+
+        assert_same_welch_output(expected, result)
+
+    @pytest.mark.parametrize("batch_size", [1, 5, 64])
+    def test_sliding_matches_analytic(self, time_serie, batch_size):
+        kwargs = dict(
+            timeserie=time_serie,
+            center=1 / 235,
+            delta=0.002,
+            repetitions=3,
+            window_size=2000,
+            batch_size=batch_size,
+        )
+
+        expected = welch_method(engine="analytic", **kwargs)
+        result = welch_method(engine="sliding", **kwargs)
+
+        assert_same_welch_output(expected, result)
+
+    def test_analytic_requires_single_segment(self, time_serie):
+        with pytest.raises(ValueError, match="window_division=1"):
+            welch_method(
+                time_serie, 1 / 235, 0.002, 3, 2000,
+                window_division=2, engine="analytic",
+            )
+
+    def test_unknown_engine(self, time_serie):
+        with pytest.raises(ValueError, match="Unknown welch engine"):
+            welch_method(time_serie, 1 / 235, 0.002, 3, 2000, engine="fast")
+
+
+class TestMomentPlan:
+    @pytest.mark.parametrize("delta", [0.01, 0.0105])
+    def test_matches_simpson_integration(self, delta):
+        rng = np.random.RandomState(0)
+        f = np.linspace(0, 0.5, 1001)
+        S = rng.rand(4, f.size)
+
+        plan = MomentPlan(0.1, delta, f)
+        m0, m2 = plan.moments(S)
+
+        f_band, _ = window_filter(f, S[0], 0.1 - delta, 0.1 + delta)
+        for i in range(S.shape[0]):
+            _, S_band = window_filter(f, S[i], 0.1 - delta, 0.1 + delta)
+            np.testing.assert_allclose(
+                m0[i], scipy.integrate.simps(S_band, dx=1)
+            )
+            np.testing.assert_allclose(
+                m2[i], scipy.integrate.simps(f_band ** 2 * S_band, dx=1)
+            )
+        assert plan.t_max == 1 / f_band[0]
+        assert plan.t_min == 1 / f_band[-1]
+
+    def test_calculate_centered_momentum_reuses_plan(self):
+        f = np.linspace(0, 0.5, 1001)
+        S = np.ones(f.size)
+        plan = MomentPlan(0.1, 0.01, f)
+
+        assert calculate_centered_momentum(0.1, 0.01, S, f) == \
+            calculate_centered_momentum(0.1, 0.01, S, f, plan=plan)
+
+    def test_empty_band(self):
+        with pytest.raises(ValueError, match="No frequency"):
+            MomentPlan(1.0, 0.01, np.linspace(0, 0.5, 11))
+
+
+class TestEstimateNaturalPeriod:
+    def test_lazy_figures(self, time_serie):
+        expected = estimate_natural_period(time_serie, 235, 0.002, 3, 2000)
+        result = estimate_natural_period(
+            time_serie, 235, 0.002, 3, 2000, lazy_figures=True
+        )
+
+        assert result[:3] == expected[:3]
+        for lazy_figure, figure in zip(result[3:], expected[3:]):
+            assert callable(lazy_figure)
+            assert type(lazy_figure()) is type(figure)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from kedro_mlflow_tutorial.utils.statistics import (
+    RunningMoments,
+    channel_statistics,
+)
+
+ALL_STATISTICS = ['mean', 'std', 'skew', 'kurtosis', 'min', 'max']
+
+
+@pytest.fixture
+def values():
+    rng = np.random.RandomState(0)
+    # Large offsets make naive sum-of-squares formulas lose precision
+    return rng.gamma(2.0, size=(6, 10007)) + np.arange(6)[:, None] * 1e4
+
+
+def reference_statistics(values):
+    return {
+        'mean': values.mean(axis=1),
+        'std': values.std(axis=1),
+        'skew': stats.skew(values, axis=1),
+        'kurtosis': stats.kurtosis(values, axis=1),
+        'min': values.min(axis=1),
+        'max': values.max(axis=1),
+    }
+
+
+class TestChannelStatistics:
+    @pytest.mark.parametrize('chunk_size', [None, 1000, 4096, 1])
+    def test_matches_reference(self, values, chunk_size):
+        result = channel_statistics(
+            values, ALL_STATISTICS, [5, 50, 95], chunk_size
+        )
+
+        for name, expected in reference_statistics(values).items():
+            np.testing.assert_allclose(result[name], expected, rtol=1e-9)
+        np.testing.assert_allclose(
+            result['p95'], np.percentile(values, 95, axis=1)
+        )
+
+    def test_sequence_of_channels(self, values):
+        result = channel_statistics(list(values), chunk_size=333)
+
+        np.testing.assert_allclose(result['mean'], values.mean(axis=1))
+        np.testing.assert_allclose(result['std'], values.std(axis=1))
+
+    def test_unknown_statistic_raises(self, values):
+        with pytest.raises(ValueError, match='median'):
+            channel_statistics(values, ['mean', 'median'])
+
+
+class TestRunningMoments:
+    def test_merge_matches_single_update(self, values):
+        expected = RunningMoments(order=4).update(values)
+        merged = RunningMoments(order=4).update(values[:, :10]).merge(
+            RunningMoments(order=4).update(values[:, 10:])
+        )
+
+        for name in ['mean', 'std', 'skew', 'kurtosis']:
+            np.testing.assert_allclose(
+                getattr(merged, name), getattr(expected, name), rtol=1e-9
+            )
+
+    def test_higher_moments_need_order_4(self, values):
+        with pytest.raises(ValueError):
+            RunningMoments().update(values).skew
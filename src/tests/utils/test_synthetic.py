@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pytest
+
+from kedro_mlflow_tutorial.pipelines.data_engineering.nodes import (
+    apply_rotation_matrix,
+)
+from kedro_mlflow_tutorial.utils.estimator import estimate_natural_period
+from kedro_mlflow_tutorial.utils.synthetic import (
+    TIME_STEP,
+    generate_sgs_run,
+    generate_sgs_runs,
+    natural_periods,
+)
+from kedro_mlflow_tutorial.utils.tpn import (
+    SGS_METADATA,
+    SGS_TIME_SERIES_COLUMNS,
+)
+
+N_STEPS = 10800
+
+
+@pytest.fixture(scope='module')
+def sgs_run():
+    return generate_sgs_run(N_STEPS, seed=3, session_id=22)
+
+
+class TestGenerateSGSRun:
+    def test_layout_matches_h5_to_dataframe(self, sgs_run):
+        data, metadata = sgs_run
+
+        assert list(data.columns) == SGS_TIME_SERIES_COLUMNS
+        assert len(data) == N_STEPS
+        assert list(metadata) == SGS_METADATA
+        assert metadata['session_id'] == 22
+
+    def test_metadata_is_json_serializable(self, sgs_run):
+        _, metadata = sgs_run
+
+        assert json.loads(json.dumps(metadata)) == metadata
+
+    def test_same_seed_same_run(self, sgs_run):
+        data, metadata = generate_sgs_run(N_STEPS, seed=3, session_id=22)
+        other, _ = generate_sgs_run(N_STEPS, seed=4, session_id=22)
+
+        assert data.equals(sgs_run[0])
+        assert metadata == sgs_run[1]
+        assert not data.equals(other)
+
+    def test_speeds_are_derivatives(self, sgs_run):
+        data, _ = sgs_run
+
+        for column in ['x', 'zz']:
+            np.testing.assert_allclose(
+                data['speed_' + column],
+                np.gradient(data[column], TIME_STEP),
+            )
+
+    @pytest.mark.parametrize('column, index', [('x', 0), ('y', 1)])
+    def test_natural_periods_are_recovered(self, sgs_run, column, index):
+        data, metadata = sgs_run
+        rotated = apply_rotation_matrix(
+            *(data[name] for name in ['x', 'y', 'z', 'xx', 'yy', 'zz'])
+        )
+
+        tp, _, _, _, _ = estimate_natural_period(
+            rotated[column].values, 235.0, 0.001, 3, 7200,
+            engine='sliding', lazy_figures=True,
+        )
+
+        expected = natural_periods(metadata)[index]
+        assert abs(tp - expected) / expected < 0.03
+
+
+def test_generate_sgs_runs():
+    runs = list(generate_sgs_runs(3, 1000, seed=10, session_id=1))
+
+    assert [env_cond_id for env_cond_id, _, _ in runs] == [1, 2, 3]
+    data, metadata = generate_sgs_run(1000, seed=13, session_id=1)
+    assert runs[-1][1].equals(data)
+    assert runs[-1][2] == metadata
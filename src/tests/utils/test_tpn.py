@@ -0,0 +1,246 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import h5py
+import numpy as np
+import pandas as pd
+import pytest
+from smb.base import NotConnectedError
+
+from kedro_mlflow_tutorial.utils import tpn
+from kedro_mlflow_tutorial.utils.cache import FileCache
+from kedro_mlflow_tutorial.utils.tpn import SGS_METADATA, TPNFileServer
+
+
+class FakeSMBConnection:
+    """In-memory stand-in for ``SMBConnection`` serving ``FakeSMBConnection.files``."""
+
+    files = {}
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.closed = False
+        self.alive = True
+        self.failures = 0
+        self.retrieved = []
+        FakeSMBConnection.instances.append(self)
+
+    def connect(self, server_ip, port):
+        return True
+
+    def echo(self, data, timeout=10):
+        if not self.alive:
+            raise NotConnectedError()
+        return data
+
+    def getAttributes(self, service_name, path, timeout=30):
+        return SimpleNamespace(
+            file_size=len(self.files[path]), last_write_time=1.0
+        )
+
+    def retrieveFile(self, service_name, path, file_obj, timeout=30):
+        self.retrieved.append(path)
+        if self.failures:
+            self.failures -= 1
+            raise NotConnectedError()
+        content = self.files[path]
+        file_obj.write(content)
+        return 0, len(content)
+
+    def retrieveFileFromOffset(self, service_name, path, file_obj, offset=0,
+                               max_length=-1, timeout=30):
+        self.retrieved.append((path, offset, max_length))
+        content = self.files[path][offset:offset + max_length]
+        file_obj.write(content)
+        return 0, len(content)
+
+    def close(self):
+        self.closed = True
+
+
+def sgs_h5_bytes(n_steps=50, chunks=None):
+    buffer = io.BytesIO()
+    with h5py.File(buffer, 'w') as h5:
+        h5.create_dataset(
+            'time_series_data',
+            data=np.arange(18 * n_steps, dtype=float).reshape(18, n_steps),
+            chunks=chunks,
+        )
+        for i, name in enumerate(SGS_METADATA):
+            h5[name] = float(i)
+
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def tpn_client(mocker):
+    FakeSMBConnection.files = {'/sgs/a.h5': b'a' * 10, '/sgs/b.h5': b'b' * 20}
+    FakeSMBConnection.instances = []
+    mocker.patch.object(tpn, 'SMBConnection', FakeSMBConnection)
+
+    return TPNFileServer('user', 'pass', '10.0.0.1', 'domain', 'share', '/sgs')
+
+
+class TestConnectionPool:
+    def test_connection_is_reused(self, tpn_client):
+        for path in ['/sgs/a.h5', '/sgs/b.h5', '/sgs/a.h5']:
+            assert tpn_client.retrieveFile(path, io.BytesIO()) > 0
+
+        assert len(FakeSMBConnection.instances) == 1
+
+        tpn_client.closeConnections()
+        assert FakeSMBConnection.instances[0].closed
+
+    def test_dead_connection_is_replaced(self, tpn_client):
+        tpn_client.retrieveFile('/sgs/a.h5', io.BytesIO())
+        FakeSMBConnection.instances[0].alive = False
+
+        tpn_client.retrieveFile('/sgs/a.h5', io.BytesIO())
+
+        assert len(FakeSMBConnection.instances) == 2
+        assert FakeSMBConnection.instances[0].closed
+
+    def test_transfer_is_retried(self, tpn_client):
+        tpn_client.retrieveFile('/sgs/a.h5', io.BytesIO())
+        FakeSMBConnection.instances[0].failures = 1
+
+        out_file = io.BytesIO()
+        assert tpn_client.retrieveFile('/sgs/b.h5', out_file) == 20
+        assert out_file.getvalue() == b'b' * 20
+        assert len(FakeSMBConnection.instances) == 2
+
+
+class TestCache:
+    def test_unchanged_files_are_not_downloaded_again(
+            self, tpn_client, tmp_path):
+        tpn_client.cache = FileCache(str(tmp_path))
+
+        first = tpn_client.retrieveCachedFile('/sgs/a.h5')
+        second = tpn_client.retrieveCachedFile('/sgs/a.h5')
+        FakeSMBConnection.files['/sgs/a.h5'] = b'c' * 12
+        third = tpn_client.retrieveCachedFile('/sgs/a.h5')
+
+        assert first == second != third
+        assert third.read_bytes() == b'c' * 12
+        assert FakeSMBConnection.instances[0].retrieved == ['/sgs/a.h5'] * 2
+
+
+class TestRetrieveSGSRunFromH5:
+    @pytest.mark.parametrize('spill_threshold', [None, 64])
+    def test_decodes_without_cache(self, tpn_client, mocker, spill_threshold):
+        FakeSMBConnection.files['/sgs/sgs.h5'] = sgs_h5_bytes()
+        tpn_client.spill_threshold = spill_threshold
+        named_file = mocker.spy(tpn.tempfile, 'NamedTemporaryFile')
+
+        df, metadata = tpn_client.retrieveSGSRunFromH5('/sgs/sgs.h5')
+
+        assert named_file.call_count == 0
+        assert df.shape == (50, 18)
+        np.testing.assert_array_equal(df['y'], np.arange(50, 100))
+        assert list(metadata) == SGS_METADATA
+        assert metadata['wave_hs'] == 9.0
+        assert type(metadata['wave_hs']) is float
+
+    def test_reads_only_requested_columns(self, tpn_client):
+        FakeSMBConnection.files['/sgs/sgs.h5'] = sgs_h5_bytes()
+        tpn_client.columns = ['yy', 'x']
+        tpn_client.metadata = ['wave_hs']
+
+        df, metadata = tpn_client.retrieveSGSRunFromH5('/sgs/sgs.h5')
+
+        assert list(df.columns) == ['yy', 'x']
+        assert metadata == {'wave_hs': 9.0}
+        np.testing.assert_array_equal(df['yy'], np.arange(200, 250))
+        np.testing.assert_array_equal(df['x'], np.arange(50))
+
+    def test_unknown_column_raises(self, tpn_client):
+        FakeSMBConnection.files['/sgs/sgs.h5'] = sgs_h5_bytes()
+        tpn_client.columns = ['x', 'roll']
+
+        with pytest.raises(ValueError, match='roll'):
+            tpn_client.retrieveSGSRunFromH5('/sgs/sgs.h5')
+
+    def test_samples_window(self, tpn_client):
+        FakeSMBConnection.files['/sgs/sgs.h5'] = sgs_h5_bytes()
+        tpn_client.samples = (10, None)
+
+        df, _ = tpn_client.retrieveSGSRunFromH5('/sgs/sgs.h5')
+
+        assert len(df) == 40
+        np.testing.assert_array_equal(df['x'], np.arange(10, 50))
+
+    @pytest.mark.parametrize('chunks', [None, (1, 1000)])
+    def test_range_reads_transfer_only_needed_bytes(self, tpn_client, chunks):
+        content = sgs_h5_bytes(n_steps=20000, chunks=chunks)
+        FakeSMBConnection.files['/sgs/sgs.h5'] = content
+        tpn_client.columns = ['x', 'yy']
+        tpn_client.samples = (500, 3500)
+
+        expected, expected_metadata = tpn_client.h5ToSGSRun(
+            io.BytesIO(content)
+        )
+        tpn_client.range_block_size = 4096
+        df, metadata = tpn_client.retrieveSGSRunFromH5('/sgs/sgs.h5')
+
+        pd.testing.assert_frame_equal(df, expected)
+        assert metadata == expected_metadata
+        np.testing.assert_array_equal(df['yy'], np.arange(80500, 83500))
+
+        transferred = sum(
+            length for _, _, length in FakeSMBConnection.instances[0].retrieved
+        )
+        assert transferred < len(content) / 10
+
+
+    def test_dataframe_methods_return_the_time_series_only(
+            self, tpn_client, mocker):
+        FakeSMBConnection.files['/sgs/sgs.h5'] = sgs_h5_bytes()
+        mocker.patch.object(
+            tpn_client, 'sgsFilePath', return_value='/sgs/sgs.h5'
+        )
+
+        df, metadata = tpn_client.retrieveSGSRun(22, 1)
+
+        assert list(metadata) == SGS_METADATA
+        for data in [
+            tpn_client.retrieveSGSData(22, 1),
+            tpn_client.retrieveDataFrameFromH5('/sgs/sgs.h5'),
+            tpn_client.h5ToDataFrame(io.BytesIO(sgs_h5_bytes())),
+        ]:
+            pd.testing.assert_frame_equal(data, df)
+
+
+class TestTransferStats:
+    def test_counters_are_recorded_per_file(self, tpn_client):
+        FakeSMBConnection.files['/sgs/sgs.h5'] = content = sgs_h5_bytes()
+
+        tpn_client.retrieveSGSRunFromH5('/sgs/sgs.h5')
+        tpn_client.retrieveFile('/sgs/a.h5', io.BytesIO())
+
+        record = tpn_client.stats.file('/sgs/sgs.h5')
+        assert record['bytes'] == len(content)
+        for counter in ['transfer_time', 'decode_time', 'total_time']:
+            assert record[counter] > 0
+        assert tpn_client.stats.totals['bytes'] == len(content) + 10
+        assert tpn_client.stats.totals['connections'] == 1
+
+
+def test_concurrent_downloads_do_not_mutate_the_client(
+        tpn_client, mocker, tmp_path):
+    FakeSMBConnection.files['/sgs/sgs.h5'] = sgs_h5_bytes()
+    mocker.patch.object(
+        tpn_client, 'sgsFilePath', return_value='/sgs/sgs.h5'
+    )
+    state = set(vars(tpn_client))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        filenames = list(executor.map(
+            lambda env_cond_id: tpn_client.downloadSGSDataAsDataFrame(
+                22, env_cond_id, str(tmp_path)
+            )[-1],
+            range(1, 9),
+        ))
+
+    assert filenames == ['22_{:04}_pos.csv'.format(i) for i in range(1, 9)]
+    assert set(vars(tpn_client)) == state